@@ -10,7 +10,12 @@ from VIPMUSIC import LOGGER, app, userbot
 from VIPMUSIC.core.call import VIP
 from VIPMUSIC.misc import sudo
 from VIPMUSIC.plugins import ALL_MODULES
-from VIPMUSIC.utils.database import get_banned_users, get_gbanned
+from VIPMUSIC.utils.database import (
+    get_banned_users,
+    get_gbanned,
+    migrate_chat_settings,
+)
+from VIPMUSIC.utils.httpclient import close_http, start_http
 from config import BANNED_USERS
 from VIPMUSIC import telethn
 
@@ -18,16 +23,20 @@ from VIPMUSIC import telethn
 from autorestart import autorestart
 
 async def init():
-    if (
-        not config.STRING1
-        and not config.STRING2
-        and not config.STRING3
-        and not config.STRING4
-        and not config.STRING5
-    ):
+    if not any(config.STRING_SESSIONS):
         LOGGER(__name__).error("𝐒𝐭𝐫𝐢𝐧𝐠 𝐒𝐞𝐬𝐬𝐢𝐨𝐧 𝐍𝐨𝐭 𝐅𝐢𝐥𝐥𝐞𝐝, 𝐏𝐥𝐞𝐚𝐬𝐞 𝐅𝐢𝐥𝐥 𝐀 𝐏𝐲𝐫𝐨𝐠𝐫𝐚𝐦 V2 𝐒𝐞𝐬𝐬𝐢𝐨𝐧🤬")
         
     await sudo()
+    await start_http()
+    try:
+        migrated = await migrate_chat_settings()
+        if migrated:
+            LOGGER(__name__).info(f"Migrated {migrated} chat settings into chat_settings.")
+    except Exception as e:
+        # Settings are read from chat_settings only, starting now would run every
+        # chat on defaults and overwrite the old values. The migration is safe to retry.
+        LOGGER(__name__).error(f"Chat settings migration failed, stopping: {e}")
+        exit()
     try:
         users = await get_gbanned()
         for user_id in users:
@@ -57,6 +66,21 @@ async def init():
     else:
         await telethn.run_until_disconnected()
                 
+    from VIPMUSIC.plugins.tools.ranking import flush_pending_counts, writes_saved
+
+    await flush_pending_counts()
+    LOGGER("VIPMUSIC.plugins.tools.ranking").info(
+        f"Ranking counters flushed, {writes_saved()} DB writes saved by batching."
+    )
+    from VIPMUSIC.core.call import speed_cache
+    from VIPMUSIC.utils.mediacache import media_cache
+    from VIPMUSIC.utils.thumbnails import thumb_cache
+
+    # Manifests are written lazily, flush whatever changed since the last write.
+    media_cache.save()
+    thumb_cache.save()
+    speed_cache.save()
+    await close_http()
     await app.stop()
     await userbot.stop()
     LOGGER("VIPMUSIC").info("                 ╔═════ஜ۩۞۩ஜ════╗\n  ♨️𝗠𝗔𝗗𝗘 𝗕𝗬 𝗩𝗜𝗣 𝗕𝗢𝗬♨️\n╚═════ஜ۩۞۩ஜ════╝")
@@ -1,9 +1,9 @@
 import asyncio
 import os
-from datetime import datetime, timedelta
 from typing import Union
 
 from pyrogram import Client
+from pyrogram.errors import FloodWait
 from pyrogram.types import InlineKeyboardMarkup
 from pytgcalls import PyTgCalls, StreamType
 from pytgcalls.exceptions import (
@@ -22,84 +22,146 @@ from VIPMUSIC.misc import db
 from VIPMUSIC.utils.database import (
     add_active_chat,
     add_active_video_chat,
+    get_assistant_number,
     get_lang,
     get_loop,
+    get_played,
     group_assistant,
+    is_active_chat,
     is_autoend,
     music_on,
+    on_active_change,
+    record_assistant_error,
     remove_active_chat,
     remove_active_video_chat,
     set_loop,
+    start_clock,
 )
 from VIPMUSIC.utils.exceptions import AssistantErr
-from VIPMUSIC.utils.formatters import check_duration, seconds_to_min, speed_converter
+from VIPMUSIC.utils.formatters import check_duration, seconds_to_min, time_to_seconds
+from VIPMUSIC.utils.mediacache import MediaCache
 from VIPMUSIC.utils.inline.play import stream_markup, stream_markup2
 from VIPMUSIC.utils.stream.autoclear import auto_clean
+from VIPMUSIC.utils.stream.prefetch import (
+    cancel_prefetch,
+    claim_download,
+    schedule_prefetch,
+)
+from VIPMUSIC.utils.stream.queueitem import ChatQueue
 from VIPMUSIC.utils.thumbnails import get_thumb
+from VIPMUSIC.utils.timers import cancel, schedule
 from strings import get_string
 
-autoend = {}
 counter = {}
 
+SPEED_DIR = os.path.join(os.getcwd(), "playback")
+# Pre-rendered speed variants, only filled when SPEED_PRERENDER is on.
+speed_cache = MediaCache(
+    "playback", os.path.join(SPEED_DIR, "manifest.json"), config.SPEED_CACHE_SIZE * 1024**2
+)
+_speed_slots = asyncio.Semaphore(config.SPEED_WORKERS)
+
+
+@on_active_change
+def _cancel_autoend(event: str, chat_id: int, mode: str):
+    if event == "leave" and mode == "call":
+        cancel(("autoend", chat_id))
+
+
+def _tempo_params(position: int, speed: float, mode: str) -> str:
+    """
+    ffmpeg parameters that play the piped input from ``position`` (seconds in
+    the original file) at ``speed``. Audio goes through atempo; py-tgcalls
+    already sets -vf on the video pipe, so video timestamps are rescaled on
+    input with -itsscale instead.
+    """
+    audio = f"-ss {position} -atmid -af atempo={speed}"
+    if mode != "video":
+        return audio
+    return f"--audio {audio} --video -ss {position} -itsscale {round(1 / speed, 4)}"
+
+
+async def _render_speed(file_path: str, speed: float):
+    """
+    Pre-render ``file_path`` at ``speed`` into playback/, only used with
+    SPEED_PRERENDER. Returns None if ffmpeg fails so the caller can fall back
+    to changing tempo on the fly.
+    """
+    out = os.path.join(SPEED_DIR, str(speed), os.path.basename(file_path))
+    if speed_cache.lookup(out):
+        return out
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    tmp = f"{out}.part{os.path.splitext(out)[1]}"
+    async with _speed_slots:
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-y",
+            "-i",
+            file_path,
+            "-filter:v",
+            f"setpts={round(1 / speed, 4)}*PTS",
+            "-filter:a",
+            f"atempo={speed}",
+            tmp,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, err = await proc.communicate()
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+    if proc.returncode != 0:
+        LOGGER(__name__).warning(
+            f"Speed render of {file_path} failed: {err.decode(errors='replace')[-200:]}"
+        )
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return None
+    os.replace(tmp, out)
+    speed_cache.add(out)
+    return out
+
 
 async def _clear_(chat_id):
-    db[chat_id] = []
+    db[chat_id] = ChatQueue()
+    cancel_prefetch(chat_id)
     await remove_active_video_chat(chat_id)
     await remove_active_chat(chat_id)
 
 
 class Call(PyTgCalls):
     def __init__(self):
-        self.userbot1 = Client(
-            name="VIPAss1",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING1),
-        )
-        self.one = PyTgCalls(
-            self.userbot1,
-            cache_duration=100,
-        )
-        self.userbot2 = Client(
-            name="VIPAss2",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING2),
-        )
-        self.two = PyTgCalls(
-            self.userbot2,
-            cache_duration=100,
-        )
-        self.userbot3 = Client(
-            name="VIPXAss3",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING3),
-        )
-        self.three = PyTgCalls(
-            self.userbot3,
-            cache_duration=100,
-        )
-        self.userbot4 = Client(
-            name="VIPXAss4",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING4),
-        )
-        self.four = PyTgCalls(
-            self.userbot4,
-            cache_duration=100,
-        )
-        self.userbot5 = Client(
-            name="VIPAss5",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING5),
-        )
-        self.five = PyTgCalls(
-            self.userbot5,
-            cache_duration=100,
-        )
+        # calls[num - 1] drives assistant ``num``, None where no session is set.
+        self.userbots = []
+        self.calls = []
+        for num, session in enumerate(config.STRING_SESSIONS, start=1):
+            if not session:
+                self.userbots.append(None)
+                self.calls.append(None)
+                continue
+            client = Client(
+                name=f"VIPAss{num}",
+                api_id=config.API_ID,
+                api_hash=config.API_HASH,
+                session_string=str(session),
+            )
+            self.userbots.append(client)
+            self.calls.append(PyTgCalls(client, cache_duration=100))
+
+    def get(self, num: int):
+        try:
+            return self.calls[int(num) - 1]
+        except (IndexError, ValueError):
+            return None
+
+    @property
+    def active_calls(self):
+        return [call for call in self.calls if call is not None]
 
     async def pause_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
@@ -118,31 +180,11 @@ class Call(PyTgCalls):
             pass
 
     async def stop_stream_force(self, chat_id: int):
-        try:
-            if config.STRING1:
-                await self.one.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING2:
-                await self.two.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING3:
-                await self.three.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING4:
-                await self.four.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING5:
-                await self.five.leave_group_call(chat_id)
-        except:
-            pass
+        for call in self.active_calls:
+            try:
+                await call.leave_group_call(chat_id)
+            except:
+                pass
         try:
             await _clear_(chat_id)
         except:
@@ -150,56 +192,42 @@ class Call(PyTgCalls):
 
     async def speedup_stream(self, chat_id: int, file_path, speed, playing):
         assistant = await group_assistant(self, chat_id)
-        if str(speed) != str("1.0"):
-            base = os.path.basename(file_path)
-            chatdir = os.path.join(os.getcwd(), "playback", str(speed))
-            if not os.path.isdir(chatdir):
-                os.makedirs(chatdir)
-            out = os.path.join(chatdir, base)
-            if not os.path.isfile(out):
-                if str(speed) == str("0.5"):
-                    vs = 2.0
-                if str(speed) == str("0.75"):
-                    vs = 1.35
-                if str(speed) == str("1.5"):
-                    vs = 0.68
-                if str(speed) == str("2.0"):
-                    vs = 0.5
-                proc = await asyncio.create_subprocess_shell(
-                    cmd=(
-                        "ffmpeg "
-                        "-i "
-                        f"{file_path} "
-                        "-filter:v "
-                        f"setpts={vs}*PTS "
-                        "-filter:a "
-                        f"atempo={speed} "
-                        f"{out}"
-                    ),
-                    stdin=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                await proc.communicate()
-            else:
-                pass
+        speed = float(speed)
+        # Position in the original file, whatever speed is playing right now.
+        position = get_played(chat_id, playing[0]["seconds"]) * float(
+            playing[0].get("speed") or 1.0
+        )
+        out = None
+        if config.SPEED_PRERENDER and speed != 1.0:
+            out = await _render_speed(file_path, speed)
+        if out:
+            dur = await asyncio.get_event_loop().run_in_executor(
+                None, check_duration, out
+            )
+            dur = int(dur)
+            duration = seconds_to_min(dur)
+            params = f"-ss {int(position / speed)} -to {duration}"
         else:
-            out = file_path
-        dur = await asyncio.get_event_loop().run_in_executor(None, check_duration, out)
-        dur = int(dur)
-        played, con_seconds = speed_converter(playing[0]["played"], speed)
-        duration = seconds_to_min(dur)
+            dur = await asyncio.get_event_loop().run_in_executor(
+                None, check_duration, file_path
+            )
+            dur = int(float(dur) / speed)
+            duration = seconds_to_min(dur)
+            params = f"-ss {int(position)}"
+            if speed != 1.0:
+                params = _tempo_params(int(position), speed, playing[0]["streamtype"])
         stream = (
             AudioVideoPiped(
-                out,
+                out or file_path,
                 audio_parameters=HighQualityAudio(),
                 video_parameters=MediumQualityVideo(),
-                additional_ffmpeg_parameters=f"-ss {played} -to {duration}",
+                additional_ffmpeg_parameters=params,
             )
             if playing[0]["streamtype"] == "video"
             else AudioPiped(
-                out,
+                out or file_path,
                 audio_parameters=HighQualityAudio(),
-                additional_ffmpeg_parameters=f"-ss {played} -to {duration}",
+                additional_ffmpeg_parameters=params,
             )
         )
         if str(db[chat_id][0]["file"]) == str(file_path):
@@ -211,11 +239,11 @@ class Call(PyTgCalls):
             if not exis:
                 db[chat_id][0]["old_dur"] = db[chat_id][0]["dur"]
                 db[chat_id][0]["old_second"] = db[chat_id][0]["seconds"]
-            db[chat_id][0]["played"] = con_seconds
+            start_clock(chat_id, int(position / speed))
             db[chat_id][0]["dur"] = duration
             db[chat_id][0]["seconds"] = dur
             db[chat_id][0]["speed_path"] = out
-            db[chat_id][0]["speed"] = speed
+            db[chat_id][0]["speed"] = str(speed)
 
     async def force_stop_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
@@ -254,18 +282,26 @@ class Call(PyTgCalls):
 
     async def seek_stream(self, chat_id, file_path, to_seek, duration, mode):
         assistant = await group_assistant(self, chat_id)
+        params = f"-ss {to_seek} -to {duration}"
+        playing = db.get(chat_id)
+        if playing and playing[0].get("speed_path"):
+            file_path = playing[0]["speed_path"]
+        elif playing and float(playing[0].get("speed") or 1.0) != 1.0:
+            # Tempo is applied on the fly, so seek in the original file's time.
+            speed = float(playing[0]["speed"])
+            params = _tempo_params(int(time_to_seconds(to_seek) * speed), speed, mode)
         stream = (
             AudioVideoPiped(
                 file_path,
                 audio_parameters=HighQualityAudio(),
                 video_parameters=MediumQualityVideo(),
-                additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
+                additional_ffmpeg_parameters=params,
             )
             if mode == "video"
             else AudioPiped(
                 file_path,
                 audio_parameters=HighQualityAudio(),
-                additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
+                additional_ffmpeg_parameters=params,
             )
         )
         await assistant.change_stream(chat_id, stream)
@@ -318,16 +354,36 @@ class Call(PyTgCalls):
         except AlreadyJoinedError:
             raise AssistantErr(_["call_9"])
         except TelegramServerError:
+            record_assistant_error(await get_assistant_number(chat_id))
+            raise AssistantErr(_["call_10"])
+        except FloodWait as e:
+            record_assistant_error(await get_assistant_number(chat_id), e.value)
             raise AssistantErr(_["call_10"])
         await add_active_chat(chat_id)
         await music_on(chat_id)
+        start_clock(chat_id)
         if video:
             await add_active_video_chat(chat_id)
         if await is_autoend():
             counter[chat_id] = {}
             users = len(await assistant.get_participants(chat_id))
             if users == 1:
-                autoend[chat_id] = datetime.now() + timedelta(minutes=1)
+                schedule(("autoend", chat_id), 60, self.auto_end, chat_id)
+
+    async def auto_end(self, chat_id: int):
+        if not await is_autoend() or not await is_active_chat(chat_id):
+            return
+        try:
+            await self.stop_stream(chat_id)
+        except:
+            return
+        try:
+            await app.send_message(
+                chat_id,
+                "» ʙᴏᴛ ᴀᴜᴛᴏᴍᴀᴛɪᴄᴀʟʟʏ ʟᴇғᴛ ᴠɪᴅᴇᴏᴄʜᴀᴛ ʙᴇᴄᴀᴜsᴇ ɴᴏ ᴏɴᴇ ᴡᴀs ʟɪsᴛᴇɴɪɴɢ ᴏɴ ᴠɪᴅᴇᴏᴄʜᴀᴛ.",
+            )
+        except:
+            pass
 
     async def change_stream(self, client, chat_id):
         check = db.get(chat_id)
@@ -343,6 +399,7 @@ class Call(PyTgCalls):
             if not check:
                 await _clear_(chat_id)
                 return await client.leave_group_call(chat_id)
+            schedule_prefetch(chat_id)
         except:
             try:
                 await _clear_(chat_id)
@@ -358,7 +415,7 @@ class Call(PyTgCalls):
             original_chat_id = check[0]["chat_id"]
             streamtype = check[0]["streamtype"]
             videoid = check[0]["vidid"]
-            db[chat_id][0]["played"] = 0
+            start_clock(chat_id)
             exis = (check[0]).get("old_dur")
             if exis:
                 db[chat_id][0]["dur"] = exis
@@ -419,6 +476,8 @@ class Call(PyTgCalls):
                     return await mystic.edit_text(
                         _["call_6"], disable_web_page_preview=True
                     )
+                if direct:
+                    claim_download(chat_id, queued, file_path)
                 if video:
                     stream = AudioVideoPiped(
                         file_path,
@@ -542,60 +601,27 @@ class Call(PyTgCalls):
                     db[chat_id][0]["markup"] = "stream"
 
     async def ping(self):
-        pings = []
-        if config.STRING1:
-            pings.append(await self.one.ping)
-        if config.STRING2:
-            pings.append(await self.two.ping)
-        if config.STRING3:
-            pings.append(await self.three.ping)
-        if config.STRING4:
-            pings.append(await self.four.ping)
-        if config.STRING5:
-            pings.append(await self.five.ping)
+        pings = [await call.ping for call in self.active_calls]
         return str(round(sum(pings) / len(pings), 3))
 
     async def start(self):
         LOGGER(__name__).info("😋sᴛᴀʀᴛɪɴɢ ᴘʏᴛɢᴄᴀʟʟs ᴄʟɪᴇɴᴛ...\n")
-        if config.STRING1:
-            await self.one.start()
-        if config.STRING2:
-            await self.two.start()
-        if config.STRING3:
-            await self.three.start()
-        if config.STRING4:
-            await self.four.start()
-        if config.STRING5:
-            await self.five.start()
+        for call in self.active_calls:
+            await call.start()
 
     async def decorators(self):
-        @self.one.on_kicked()
-        @self.two.on_kicked()
-        @self.three.on_kicked()
-        @self.four.on_kicked()
-        @self.five.on_kicked()
-        @self.one.on_closed_voice_chat()
-        @self.two.on_closed_voice_chat()
-        @self.three.on_closed_voice_chat()
-        @self.four.on_closed_voice_chat()
-        @self.five.on_closed_voice_chat()
-        @self.one.on_left()
-        @self.two.on_left()
-        @self.three.on_left()
-        @self.four.on_left()
-        @self.five.on_left()
         async def stream_services_handler(_, chat_id: int):
             await self.stop_stream(chat_id)
 
-        @self.one.on_stream_end()
-        @self.two.on_stream_end()
-        @self.three.on_stream_end()
-        @self.four.on_stream_end()
-        @self.five.on_stream_end()
         async def stream_end_handler1(client, update: Update):
             if not isinstance(update, StreamAudioEnded):
                 return
             await self.change_stream(client, update.chat_id)
 
+        for call in self.active_calls:
+            call.on_kicked()(stream_services_handler)
+            call.on_closed_voice_chat()(stream_services_handler)
+            call.on_left()(stream_services_handler)
+            call.on_stream_end()(stream_end_handler1)
 
 VIP = Call()
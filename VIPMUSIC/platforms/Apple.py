@@ -1,9 +1,41 @@
+import asyncio
 import re
 from typing import Union
 
-import aiohttp
 from bs4 import BeautifulSoup
-from youtubesearchpython.__future__ import VideosSearch
+
+from VIPMUSIC.utils.cache import TTLCache
+from VIPMUSIC.utils.httpclient import request
+from VIPMUSIC.utils.trackmap import queue_entries, remember, resolve, track_keys
+from VIPMUSIC.utils.videometa import lookup, normalize
+from config import LINK_CACHE_SIZE, LINK_CACHE_TTL
+
+# page url -> what was parsed out of it
+apple_pages = TTLCache("apple_pages", LINK_CACHE_SIZE, LINK_CACHE_TTL)
+
+
+def _title(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    search = None
+    for tag in soup.find_all("meta"):
+        if tag.get("property", None) == "og:title":
+            search = tag.get("content", None)
+    return search
+
+
+def _songs(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    applelinks = soup.find_all("meta", attrs={"property": "music:song"})
+    results = []
+    for item in applelinks:
+        try:
+            xx = (((item["content"]).split("album/")[1]).split("/")[0]).replace(
+                "-", " "
+            )
+        except:
+            xx = ((item["content"]).split("album/")[1]).split("/")[0]
+        results.append((xx, item["content"]))
+    return results
 
 
 class AppleAPI:
@@ -17,55 +49,57 @@ class AppleAPI:
         else:
             return False
 
+    async def _page(self, url, parse):
+        """Fetch ``url`` and run ``parse`` on it in the executor, cached per url."""
+        parsed = apple_pages.get(url)
+        if parsed is not None:
+            return parsed
+        async with await request("GET", url) as response:
+            if response.status != 200:
+                return None
+            html = await response.text()
+        parsed = await asyncio.get_running_loop().run_in_executor(None, parse, html)
+        if parsed:
+            apple_pages.set(url, parsed)
+        return parsed
+
     async def track(self, url, playid: Union[bool, str] = None):
         if playid:
             url = self.base + url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
-        soup = BeautifulSoup(html, "html.parser")
-        search = None
-        for tag in soup.find_all("meta"):
-            if tag.get("property", None) == "og:title":
-                search = tag.get("content", None)
-        if search is None:
+        keys = [f"url:{normalize(url)}"]
+        vidid = await resolve(keys)
+        if vidid:
+            result = await lookup(f"https://www.youtube.com/watch?v={vidid}")
+        else:
+            search = await self._page(url, _title)
+            if not search:
+                return False
+            keys += track_keys(search)
+            result = await lookup(search)
+        if not result:
             return False
-        results = VideosSearch(search, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            ytlink = result["link"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
+        await remember(keys, result["id"])
         track_details = {
-            "title": title,
-            "link": ytlink,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
+            "title": result["title"],
+            "link": result["link"],
+            "vidid": result["id"],
+            "duration_min": result["duration"],
+            "thumb": result["thumb"],
         }
-        return track_details, vidid
+        return track_details, result["id"]
 
     async def playlist(self, url, playid: Union[bool, str] = None):
         if playid:
             url = self.base + url
         playlist_id = url.split("playlist/")[1]
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
-        soup = BeautifulSoup(html, "html.parser")
-        applelinks = soup.find_all("meta", attrs={"property": "music:song"})
-        results = []
-        for item in applelinks:
-            try:
-                xx = (((item["content"]).split("album/")[1]).split("/")[0]).replace(
-                    "-", " "
-                )
-            except:
-                xx = ((item["content"]).split("album/")[1]).split("/")[0]
-            results.append(xx)
+        songs = await self._page(url, _songs)
+        if not songs:
+            return False
+        # Unmapped songs are searched by resolve_playlist, PLAYLIST_RESOLVE_WORKERS at a time.
+        results = await queue_entries(
+            [
+                (query, [f"url:{normalize(link)}"] + track_keys(query))
+                for query, link in songs
+            ]
+        )
         return results, playlist_id
@@ -1,8 +1,19 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from os import path
 
 from yt_dlp import YoutubeDL
 
+from VIPMUSIC.utils.cache import TTLCache
 from VIPMUSIC.utils.formatters import seconds_to_min
+from VIPMUSIC.utils.mediacache import media_cache
+from config import LINK_CACHE_SIZE, LINK_CACHE_TTL, SOUNDCLOUD_WORKERS
+
+# link -> track details of its download in downloads/
+sound_tracks = TTLCache("soundcloud_tracks", LINK_CACHE_SIZE, LINK_CACHE_TTL)
+_pool = ThreadPoolExecutor(SOUNDCLOUD_WORKERS, thread_name_prefix="soundcloud")
+# link -> download currently running for it
+_downloads = {}
 
 
 class SoundAPI:
@@ -21,13 +32,19 @@ class SoundAPI:
         else:
             return False
 
-    async def download(self, url):
+    def _extract(self, url):
         d = YoutubeDL(self.opts)
+        return d.extract_info(url)
+
+    async def _download(self, url):
         try:
-            info = d.extract_info(url)
+            info = await asyncio.get_running_loop().run_in_executor(
+                _pool, self._extract, url
+            )
         except:
             return False
         xyz = path.join("downloads", f"{info['id']}.{info['ext']}")
+        media_cache.add(xyz)
         duration_min = seconds_to_min(info["duration"])
         track_details = {
             "title": info["title"],
@@ -36,4 +53,20 @@ class SoundAPI:
             "uploader": info["uploader"],
             "filepath": xyz,
         }
+        sound_tracks.set(url, track_details)
         return track_details, xyz
+
+    async def download(self, url):
+        """
+        Download ``url`` in the SoundCloud pool. Links downloaded before are
+        served from downloads/ while the media cache still has the file, and
+        callers asking for the same link at once share one download.
+        """
+        track_details = sound_tracks.get(url)
+        if track_details and media_cache.lookup(track_details["filepath"]):
+            return track_details, track_details["filepath"]
+        download = _downloads.get(url)
+        if download is None:
+            download = _downloads[url] = asyncio.ensure_future(self._download(url))
+            download.add_done_callback(lambda _: _downloads.pop(url, None))
+        return await asyncio.shield(download)
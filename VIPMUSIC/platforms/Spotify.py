@@ -1,10 +1,26 @@
+import asyncio
 import re
+from functools import partial
 
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
-from youtubesearchpython.__future__ import VideosSearch
 
 import config
+from VIPMUSIC.utils.trackmap import queue_entries, remember, resolve, track_keys
+from VIPMUSIC.utils.videometa import lookup
+
+
+def _query(track: dict) -> str:
+    info = track["name"]
+    for artist in track["artists"]:
+        fetched = f' {artist["name"]}'
+        if "Various Artists" not in fetched:
+            info += fetched
+    return info
+
+
+def _keys(track: dict) -> list:
+    return track_keys(_query(track), (track.get("external_ids") or {}).get("isrc"))
 
 
 class SpotifyAPI:
@@ -28,71 +44,88 @@ class SpotifyAPI:
         else:
             return False
 
+    async def _call(self, method, *args, **kwargs):
+        # spotipy is blocking, keep it off the event loop.
+        return await asyncio.get_running_loop().run_in_executor(
+            None, partial(method, *args, **kwargs)
+        )
+
+    async def _pages(self, method, item_id: str, first: dict) -> list:
+        """
+        Every item of a paged Spotify listing whose first page is ``first``,
+        up to PLAYLIST_FETCH_LIMIT. The remaining pages are fetched
+        SPOTIFY_PAGE_WORKERS at a time.
+        """
+        limit = first["limit"] or len(first["items"]) or 1
+        total = min(first["total"], config.PLAYLIST_FETCH_LIMIT)
+        slots = asyncio.Semaphore(config.SPOTIFY_PAGE_WORKERS)
+
+        async def page(offset):
+            async with slots:
+                return await self._call(method, item_id, limit=limit, offset=offset)
+
+        pages = await asyncio.gather(
+            *(page(offset) for offset in range(len(first["items"]), total, limit))
+        )
+        items = list(first["items"])
+        for result in pages:
+            items.extend(result["items"])
+        return items[:total]
+
+    async def _entries(self, tracks: list) -> list:
+        return await queue_entries(
+            [
+                (_query(track), _keys(track))
+                for track in tracks
+                # Removed tracks come back as None, podcast episodes have no artists.
+                if track and track.get("type", "track") == "track"
+            ]
+        )
+
     async def track(self, link: str):
-        track = self.spotify.track(link)
-        info = track["name"]
-        for artist in track["artists"]:
-            fetched = f' {artist["name"]}'
-            if "Various Artists" not in fetched:
-                info += fetched
-        results = VideosSearch(info, limit=1)
-        for result in (await results.next())["result"]:
-            ytlink = result["link"]
-            title = result["title"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
+        track = await self._call(self.spotify.track, link)
+        keys = _keys(track)
+        vidid = await resolve(keys)
+        if vidid:
+            result = await lookup(f"https://www.youtube.com/watch?v={vidid}")
+        else:
+            result = await lookup(_query(track))
+        if not result:
+            raise ValueError(f"No YouTube result for {link}")
+        await remember(keys, result["id"])
         track_details = {
-            "title": title,
-            "link": ytlink,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
+            "title": result["title"],
+            "link": result["link"],
+            "vidid": result["id"],
+            "duration_min": result["duration"],
+            "thumb": result["thumb"],
         }
-        return track_details, vidid
+        return track_details, result["id"]
 
     async def playlist(self, url):
-        playlist = self.spotify.playlist(url)
+        playlist = await self._call(self.spotify.playlist, url)
         playlist_id = playlist["id"]
-        results = []
-        for item in playlist["tracks"]["items"]:
-            music_track = item["track"]
-            info = music_track["name"]
-            for artist in music_track["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
+        items = await self._pages(
+            self.spotify.playlist_items, playlist_id, playlist["tracks"]
+        )
+        results = await self._entries([item["track"] for item in items])
         return results, playlist_id
 
     async def album(self, url):
-        album = self.spotify.album(url)
+        album = await self._call(self.spotify.album, url)
         album_id = album["id"]
-        results = []
-        for item in album["tracks"]["items"]:
-            info = item["name"]
-            for artist in item["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
-
+        items = await self._pages(self.spotify.album_tracks, album_id, album["tracks"])
+        results = await self._entries(items)
         return (
             results,
             album_id,
         )
 
     async def artist(self, url):
-        artistinfo = self.spotify.artist(url)
+        artistinfo, artisttoptracks = await asyncio.gather(
+            self._call(self.spotify.artist, url),
+            self._call(self.spotify.artist_top_tracks, url),
+        )
         artist_id = artistinfo["id"]
-        results = []
-        artisttoptracks = self.spotify.artist_top_tracks(url)
-        for item in artisttoptracks["tracks"]:
-            info = item["name"]
-            for artist in item["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
-
+        results = await self._entries(artisttoptracks["tracks"])
         return results, artist_id
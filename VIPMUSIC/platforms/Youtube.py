@@ -3,18 +3,22 @@ import asyncio
 import os
 import re
 import json
+from functools import partial
 from typing import Union
 import requests
-import yt_dlp
 from pyrogram.enums import MessageEntityType
 from pyrogram.types import Message
-from youtubesearchpython.__future__ import VideosSearch
+from VIPMUSIC.utils.cookiepool import CookiePool
 from VIPMUSIC.utils.database import is_on_off
 from VIPMUSIC import app
 from VIPMUSIC.utils.formatters import time_to_seconds
+from VIPMUSIC.utils.httpclient import get_session, request
+from VIPMUSIC.utils.mediacache import media_cache
+from VIPMUSIC.utils.proxypool import ProxyPool
+from VIPMUSIC.utils.videometa import lookup, lookup_many
+from VIPMUSIC.utils.ytjobs import YtDlpError, base_args, run_ytdlp
 import os
 import glob
-import random
 import logging
 import pymongo
 from pymongo import MongoClient
@@ -76,44 +80,32 @@ def _parse_proxy_list(proxy_env: str):
 YTDLP_PROXY_POOL = _parse_proxy_list(YTDLP_PROXIES)
 PLAYWRIGHT_PROXY_POOL = _parse_proxy_list(PLAYWRIGHT_PROXIES)
 
-def choose_random_proxy(pool):
-    if not pool:
-        return None
-    return random.choice(pool)
+# Picked by health and latency instead of uniformly, see utils/proxypool.py
+ytdlp_proxies = ProxyPool("yt-dlp", YTDLP_PROXY_POOL)
+playwright_proxies = ProxyPool("playwright", PLAYWRIGHT_PROXY_POOL)
 
 # ========== COOKIE FILE HELPERS ==========
+cookie_pool = CookiePool(COOKIES_DIR, config.COOKIE_FAIL_LIMIT, config.COOKIE_QUARANTINE)
+
+
 def cookie_txt_file():
     """
-    Return a random cookie txt path from cookies dir, or attempt to refresh automatically if enabled.
+    Return the healthiest-looking cookie txt path from the pool. When none is
+    left a refresh is scheduled in the background (AUTO_REFRESH_COOKIES).
     """
-    cookie_dir = COOKIES_DIR
-    if not os.path.exists(cookie_dir):
-        if AUTO_REFRESH_COOKIES:
-            logger.info("Cookies directory missing — attempting auto-refresh (AUTO_REFRESH_COOKIES is enabled).")
-            try:
-                # attempt to refresh cookies
-                asyncio.get_event_loop().run_until_complete(refresh_cookies_playwright())
-            except Exception as e:
-                logger.error(f"Auto-refresh cookies failed: {e}")
-        # still not present or creation failed
-        if not os.path.exists(cookie_dir):
-            return None
-
-    cookies_files = [f for f in os.listdir(cookie_dir) if f.endswith(".txt")]
-    if not cookies_files:
-        # try auto-refresh if enabled
-        if AUTO_REFRESH_COOKIES:
-            logger.info("No cookie files found — attempting auto-refresh (AUTO_REFRESH_COOKIES is enabled).")
-            try:
-                asyncio.get_event_loop().run_until_complete(refresh_cookies_playwright())
-            except Exception as e:
-                logger.error(f"Auto-refresh cookies failed: {e}")
-        cookies_files = [f for f in os.listdir(cookie_dir) if f.endswith(".txt")]
-        if not cookies_files:
-            return None
-    cookie_file = os.path.join(cookie_dir, random.choice(cookies_files))
+    cookie_file = cookie_pool.pick()
+    if cookie_file is None or not cookie_pool.healthy():
+        cookie_pool.schedule_refresh()
     return cookie_file
 
+
+def _report_ytdlp(cookie_file, proxy, started, error=None, path=None):
+    """Feed the outcome of one yt-dlp run to the cookie and proxy pools."""
+    cookie_pool.report(cookie_file, error)
+    nbytes = os.path.getsize(path) if path and os.path.isfile(path) else 0
+    elapsed = time.monotonic() - started if nbytes else 0.0
+    ytdlp_proxies.report(proxy, error, nbytes=nbytes, elapsed=elapsed)
+
 # ========== NEW: Playwright cookie refresh (creates Netscape cookies.txt compatible with yt-dlp) ==========
 async def refresh_cookies_playwright(proxy: str = None, headless: bool = True, save_json: bool = False):
     """
@@ -129,7 +121,7 @@ async def refresh_cookies_playwright(proxy: str = None, headless: bool = True, s
 
     # choose proxy from pool if not provided
     if not proxy:
-        proxy = choose_random_proxy(PLAYWRIGHT_PROXY_POOL)
+        proxy = playwright_proxies.pick()
 
     timestamp = int(time.time())
     cookie_filename = os.path.join(COOKIES_DIR, f"cookie_{timestamp}.txt")
@@ -182,8 +174,11 @@ async def refresh_cookies_playwright(proxy: str = None, headless: bool = True, s
 
             # Navigate and perform login flow
             # We attempt a resilient login — YouTube / Google behaviour may change; adapt selectors if needed.
+            started = time.monotonic()
             await page.goto("https://accounts.google.com/ServiceLogin?service=youtube", timeout=60000)
             await page.wait_for_load_state("networkidle", timeout=60000)
+            # The first page load is what the proxy is judged on.
+            playwright_proxies.report(proxy, latency=time.monotonic() - started)
 
             # Enter email
             # Note: Google may use different flows (select account or email), we attempt common selectors.
@@ -257,13 +252,25 @@ async def refresh_cookies_playwright(proxy: str = None, headless: bool = True, s
 
     except Exception as e:
         log.error(f"Playwright cookie refresh failed: {e}")
+        # Only network errors (proxy refused, timeouts) count against the proxy.
+        playwright_proxies.report(proxy, error=str(e))
         raise
 
+async def _ensure_cookies():
+    from VIPMUSIC.plugins.bot.cookie_refresher import ensure_cookies
+
+    return await ensure_cookies()
+
+
+if AUTO_REFRESH_COOKIES:
+    # Tried in order by the pool's background refresh until one yields a file.
+    cookie_pool.refreshers = [refresh_cookies_playwright, _ensure_cookies]
+
 # ========== API helper wrappers with auto-refresh on 401 (NEW) ==========
 async def _post_with_api_refresh(url: str, json_payload: dict, headers: dict, session: aiohttp.ClientSession, retries: int = 1):
     """
-    Make a POST request to API_URL with provided headers. If response is 401 and AUTO_REFRESH_COOKIES enabled,
-    attempt to refresh cookies and retry once (retries param controls attempts).
+    Make a POST request to API_URL with provided headers. A 401 or an exception schedules a background
+    cookie refresh (AUTO_REFRESH_COOKIES); exceptions are retried (retries param controls attempts).
     Returns the aiohttp response object (not the content).
     (NEW)
     """
@@ -277,28 +284,14 @@ async def _post_with_api_refresh(url: str, json_payload: dict, headers: dict, se
             if resp.status == 401:
                 # attempt cookie refresh if configured
                 logger.warning(f"[API] Received 401 from {url} (attempt {attempt}/{retries+1})")
-                if AUTO_REFRESH_COOKIES:
-                    try:
-                        logger.info("AUTO_REFRESH_COOKIES enabled — attempting to refresh cookies due to 401.")
-                        # run refresh synchronously in event loop
-                        await refresh_cookies_playwright()
-                        # after refresh, retry by continuing loop
-                        continue
-                    except Exception as e:
-                        logger.error(f"Auto refresh during API 401 failed: {e}")
-                        # fallthrough and raise after exhausting retries
-                # if not enabled or refresh failed: return resp so caller can handle
+                # refresh in the background, the caller falls back to yt-dlp meanwhile
+                cookie_pool.schedule_refresh()
                 return resp
             return resp
         except Exception as e:
             last_exception = e
             logger.error(f"Exception while POST to {url}: {e}")
-            if AUTO_REFRESH_COOKIES:
-                try:
-                    logger.info("Attempting auto-refresh cookies after POST exception.")
-                    await refresh_cookies_playwright()
-                except Exception as re:
-                    logger.error(f"Auto refresh after POST exception failed: {re}")
+            cookie_pool.schedule_refresh()
             # continue to retry loop until attempts exhausted
     # after loop
     if last_exception:
@@ -306,61 +299,129 @@ async def _post_with_api_refresh(url: str, json_payload: dict, headers: dict, se
     return None
 
 # ========== AUDIO / VIDEO DOWNLOAD LOGIC (kept original behaviour, with small drops for proxies and auto-refresh) ==========
-async def download_song(link: str) -> str:
-    video_id = link.split('v=')[-1].split('&')[0] if 'v=' in link else link
-    logger = get_logger("HeartBeat/platforms/Youtube.py")
-    logger.info(f"🎵 [AUDIO] Starting download process for ID: {video_id}")
+DOWNLOAD_DIR = "downloads"
 
-    if not video_id or len(video_id) < 3:
-        return
+# (video_id, "audio" | "video") -> future of the download already running for it
+_downloads = {}
+# same key -> mystic messages of every caller waiting on that download
+_watchers = {}
 
-    DOWNLOAD_DIR = "downloads"
-    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(DOWNLOAD_DIR, f"{video_id}.webm")
 
-    # local file exists
-    if os.path.exists(file_path):
-        logger.info(f"🎵 [LOCAL] Found existing file for ID: {video_id}")
-        return file_path
+async def _single_flight(key, factory, mystic=None):
+    """
+    Run ``factory()`` once per key; concurrent callers await the same future.
+    The shared download is shielded so a cancelled waiter doesn't abort it for
+    the others, only when the last waiter goes away is the download cancelled.
+    """
+    fut = _downloads.get(key)
+    if fut is None:
+        fut = asyncio.ensure_future(factory())
+        _downloads[key] = fut
+
+        def _done(f):
+            if _downloads.get(key) is f:
+                del _downloads[key]
+
+        fut.add_done_callback(_done)
+    waiters = _watchers.setdefault(key, [])
+    waiters.append(mystic)
+    try:
+        return await asyncio.shield(fut)
+    except asyncio.CancelledError:
+        if len(waiters) == 1 and not fut.done():
+            fut.cancel()
+        raise
+    finally:
+        waiters.remove(mystic)
+        if not waiters and _watchers.get(key) is waiters:
+            del _watchers[key]
 
-    # ------------------------------
-    # API FIRST
-    # ------------------------------
+
+async def _report_progress(key, percent: str, speed: str, eta: str):
+    text = f"ᴅᴏᴡɴʟᴏᴀᴅɪɴɢ...\n\n<b>{percent}</b> | {speed} | ᴇᴛᴀ {eta}"
+    for mystic in list(_watchers.get(key, ())):
+        if mystic is None:
+            continue
+        try:
+            await mystic.edit_text(text)
+        except Exception:
+            pass
+
+
+def _temp_path(file_path: str) -> str:
+    root, ext = os.path.splitext(file_path)
+    return f"{root}.part{ext}"
+
+
+def _commit_download(tmp_path: str, file_path: str) -> bool:
+    """Atomically move a finished download into place and hand it to the media cache."""
+    if not os.path.isfile(tmp_path) or not os.path.getsize(tmp_path):
+        _discard(tmp_path)
+        return False
+    os.replace(tmp_path, file_path)
+    media_cache.add(file_path)
+    return True
+
+
+def _discard(tmp_path: str):
     try:
-        async with aiohttp.ClientSession() as session:
-            payload = {"url": video_id, "type": "audio"}
-            headers = {"Content-Type": "application/json", "X-API-KEY": API_KEY}
+        os.remove(tmp_path)
+    except OSError:
+        pass
 
-            resp = await _post_with_api_refresh(f"{API_URL}/download", payload, headers, session, retries=1)
-            if resp is None:
-                raise Exception("No response from API")
 
-            if resp.status == 401:
-                logger.error("[API] Invalid API key")
-                raise Exception("Invalid API key")
+async def _api_download(video_id: str, kind: str, tmp_path: str):
+    tag = kind.upper()
+    session = get_session()
+    payload = {"url": video_id, "type": kind}
+    headers = {"Content-Type": "application/json", "X-API-KEY": API_KEY}
+
+    resp = await _post_with_api_refresh(f"{API_URL}/download", payload, headers, session, retries=1)
+    if resp is None:
+        raise Exception("No response from API")
+
+    async with resp:
+        if resp.status == 401:
+            logger.error("[API] Invalid API key")
+            raise Exception("Invalid API key")
 
-            if resp.status != 200:
-                raise Exception(f"API returned {resp.status}")
+        if resp.status != 200:
+            raise Exception(f"[{tag}] API returned {resp.status}")
 
-            data = await resp.json()
+        data = await resp.json()
 
-            if data.get("status") != "success" or not data.get("download_url"):
-                raise Exception(f"[AUDIO] API response error: {data}")
+    if data.get("status") != "success" or not data.get("download_url"):
+        raise Exception(f"[{tag}] API response error: {data}")
 
-            download_link = f"{API_URL}{data['download_url']}"
+    download_link = f"{API_URL}{data['download_url']}"
 
-            async with session.get(download_link) as file_response:
-                if file_response.status != 200:
-                    raise Exception(f"[AUDIO] Download failed: {file_response.status}")
+    async with await request("GET", download_link) as file_response:
+        if file_response.status != 200:
+            raise Exception(f"[{tag}] Download failed: {file_response.status}")
 
-                with open(file_path, "wb") as f:
-                    async for chunk in file_response.content.iter_chunked(8192):
-                        f.write(chunk)
+        with open(tmp_path, "wb") as f:
+            async for chunk in file_response.content.iter_chunked(8192):
+                f.write(chunk)
 
+
+async def _fetch_song(link: str, video_id: str, file_path: str) -> str:
+    tmp_path = _temp_path(file_path)
+
+    # ------------------------------
+    # API FIRST
+    # ------------------------------
+    try:
+        await _api_download(video_id, "audio", tmp_path)
+        if not _commit_download(tmp_path, file_path):
+            raise Exception("[AUDIO] API returned an empty file")
         logger.info(f"🎵 [API] Download completed successfully for ID: {video_id}")
         return file_path
 
+    except asyncio.CancelledError:
+        _discard(tmp_path)
+        raise
     except Exception as e:
+        _discard(tmp_path)
         logger.warning(f"[API AUDIO FAILED] {e} – falling back to yt-dlp")
 
     # ------------------------------
@@ -372,80 +433,47 @@ async def download_song(link: str) -> str:
         return None
 
     # choose a proxy for yt-dlp if provided
-    proxy = choose_random_proxy(YTDLP_PROXY_POOL)
-    ydl_opts = {
-        "format": "bestaudio/best",
-        "outtmpl": file_path,
-        "cookiefile": cookie_file,
-        "quiet": True,
-    }
+    proxy = ytdlp_proxies.pick()
     if proxy:
-        ydl_opts["proxy"] = proxy
         logger.info(f"[yt-dlp] Using proxy: {proxy}")
 
+    started = time.monotonic()
     try:
-        yt_dlp.YoutubeDL(ydl_opts).download([link])
+        await run_ytdlp(
+            ["-f", "bestaudio/best", "-o", tmp_path, *base_args(cookie_file, proxy), link],
+            progress=partial(_report_progress, (video_id, "audio")),
+        )
+        _report_ytdlp(cookie_file, proxy, started, path=tmp_path)
+        if not _commit_download(tmp_path, file_path):
+            raise Exception("yt-dlp produced no file")
         logger.info(f"[yt-dlp] Audio downloaded for {video_id}")
         return file_path
     except Exception as e:
+        if isinstance(e, YtDlpError):
+            _report_ytdlp(cookie_file, proxy, started, str(e))
+        _discard(tmp_path)
         logger.error(f"[yt-dlp AUDIO FAILED] {e}")
         return None
 
 
-async def download_video(link: str) -> str:
-    video_id = link.split('v=')[-1].split('&')[0] if 'v=' in link else link
-    logger = get_logger("HeartBeat/platforms/Youtube.py")
-    logger.info(f"🎥 [VIDEO] Starting download process for ID: {video_id}")
-
-    if not video_id or len(video_id) < 3:
-        return
-
-    DOWNLOAD_DIR = "downloads"
-    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(DOWNLOAD_DIR, f"{video_id}.mkv")
-
-    # local file exists
-    if os.path.exists(file_path):
-        logger.info(f"🎥 [LOCAL] Found existing file for ID: {video_id}")
-        return file_path
+async def _fetch_video(link: str, video_id: str, file_path: str) -> str:
+    tmp_path = _temp_path(file_path)
 
     # ------------------------------
     # API FIRST
     # ------------------------------
     try:
-        async with aiohttp.ClientSession() as session:
-            payload = {"url": video_id, "type": "video"}
-            headers = {"Content-Type": "application/json", "X-API-KEY": API_KEY}
-
-            resp = await _post_with_api_refresh(f"{API_URL}/download", payload, headers, session, retries=1)
-            if resp is None:
-                raise Exception("No response from API")
-
-            if resp.status == 401:
-                raise Exception("Invalid API key")
-
-            if resp.status != 200:
-                raise Exception(f"[VIDEO] API returned {resp.status}")
-
-            data = await resp.json()
-
-            if data.get("status") != "success" or not data.get("download_url"):
-                raise Exception(f"[VIDEO] API response error: {data}")
-
-            download_link = f"{API_URL}{data['download_url']}"
-
-            async with session.get(download_link) as file_response:
-                if file_response.status != 200:
-                    raise Exception(f"[VIDEO] Download failed: {file_response.status}")
-
-                with open(file_path, "wb") as f:
-                    async for chunk in file_response.content.iter_chunked(8192):
-                        f.write(chunk)
-
+        await _api_download(video_id, "video", tmp_path)
+        if not _commit_download(tmp_path, file_path):
+            raise Exception("[VIDEO] API returned an empty file")
         logger.info(f"🎥 [API] Download completed successfully for ID: {video_id}")
         return file_path
 
+    except asyncio.CancelledError:
+        _discard(tmp_path)
+        raise
     except Exception as e:
+        _discard(tmp_path)
         logger.warning(f"[API VIDEO FAILED] {e} – falling back to yt-dlp")
 
     # ------------------------------
@@ -456,26 +484,74 @@ async def download_video(link: str) -> str:
         logger.error("Cookies missing – cannot download video")
         return None
 
-    proxy = choose_random_proxy(YTDLP_PROXY_POOL)
-    ydl_opts = {
-        "format": "bestvideo+bestaudio/best",
-        "outtmpl": file_path,
-        "cookiefile": cookie_file,
-        "merge_output_format": "mkv",
-        "quiet": True,
-    }
+    proxy = ytdlp_proxies.pick()
     if proxy:
-        ydl_opts["proxy"] = proxy
         logger.info(f"[yt-dlp] Using proxy: {proxy}")
 
+    started = time.monotonic()
     try:
-        yt_dlp.YoutubeDL(ydl_opts).download([link])
+        await run_ytdlp(
+            [
+                "-f", "bestvideo+bestaudio/best",
+                "--merge-output-format", "mkv",
+                "-o", tmp_path,
+                *base_args(cookie_file, proxy),
+                link,
+            ],
+            progress=partial(_report_progress, (video_id, "video")),
+        )
+        _report_ytdlp(cookie_file, proxy, started, path=tmp_path)
+        if not _commit_download(tmp_path, file_path):
+            raise Exception("yt-dlp produced no file")
         logger.info(f"[yt-dlp] Video downloaded for {video_id}")
         return file_path
     except Exception as e:
+        if isinstance(e, YtDlpError):
+            _report_ytdlp(cookie_file, proxy, started, str(e))
+        _discard(tmp_path)
         logger.error(f"[yt-dlp VIDEO FAILED] {e}")
         return None
 
+
+async def download_song(link: str, mystic=None) -> str:
+    video_id = link.split('v=')[-1].split('&')[0] if 'v=' in link else link
+    logger.info(f"🎵 [AUDIO] Starting download process for ID: {video_id}")
+
+    if not video_id or len(video_id) < 3:
+        return
+
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    file_path = os.path.join(DOWNLOAD_DIR, f"{video_id}.webm")
+
+    # served from the media cache
+    if media_cache.lookup(file_path):
+        logger.info(f"🎵 [LOCAL] Found existing file for ID: {video_id}")
+        return file_path
+
+    return await _single_flight(
+        (video_id, "audio"), lambda: _fetch_song(link, video_id, file_path), mystic
+    )
+
+
+async def download_video(link: str, mystic=None) -> str:
+    video_id = link.split('v=')[-1].split('&')[0] if 'v=' in link else link
+    logger.info(f"🎥 [VIDEO] Starting download process for ID: {video_id}")
+
+    if not video_id or len(video_id) < 3:
+        return
+
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    file_path = os.path.join(DOWNLOAD_DIR, f"{video_id}.mkv")
+
+    # served from the media cache
+    if media_cache.lookup(file_path):
+        logger.info(f"🎥 [LOCAL] Found existing file for ID: {video_id}")
+        return file_path
+
+    return await _single_flight(
+        (video_id, "video"), lambda: _fetch_video(link, video_id, file_path), mystic
+    )
+
 # ========== SIZE CHECK (keeps logic, adds proxy support and cookie auto-refresh) ==========
 async def check_file_size(link):
     async def get_format_info(link):
@@ -485,22 +561,20 @@ async def check_file_size(link):
             return None
 
         # choose proxy if available
-        proxy = choose_random_proxy(YTDLP_PROXY_POOL)
-        proxy_arg = f"--proxy \"{proxy}\"" if proxy else ""
-
-        proc = await asyncio.create_subprocess_exec(
-            "yt-dlp",
-            "--cookies", cookie_file,
-            "-J",
-            link,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await proc.communicate()
-        if proc.returncode != 0:
-            print(f'Error:\n{stderr.decode()}')
+        proxy = ytdlp_proxies.pick()
+
+        started = time.monotonic()
+        try:
+            stdout = await run_ytdlp(
+                ["-J", *base_args(cookie_file, proxy), link],
+                timeout=config.YTDLP_INFO_TIMEOUT,
+            )
+        except YtDlpError as e:
+            _report_ytdlp(cookie_file, proxy, started, str(e))
+            print(f'Error:\n{e}')
             return None
-        return json.loads(stdout.decode())
+        _report_ytdlp(cookie_file, proxy, started)
+        return json.loads(stdout)
 
     def parse_size(formats):
         total_size = 0
@@ -570,22 +644,20 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-            vidid = result["id"]
-            duration_sec = int(time_to_seconds(duration_min)) if duration_min else 0
-        return title, duration_min, duration_sec, thumbnail, vidid
+        result = await lookup(link)
+        if not result:
+            raise ValueError(f"No YouTube result for {link}")
+        duration_min = result["duration"]
+        duration_sec = int(time_to_seconds(duration_min)) if duration_min else 0
+        return result["title"], duration_min, duration_sec, result["thumb"], result["id"]
 
     async def title(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        result = await lookup(link)
+        if result:
             return result["title"]
 
     async def duration(self, link: str, videoid: Union[bool, str] = None):
@@ -593,8 +665,8 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        result = await lookup(link)
+        if result:
             return result["duration"]
 
     async def thumbnail(self, link: str, videoid: Union[bool, str] = None):
@@ -602,9 +674,9 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
-            return result["thumbnails"][0]["url"].split("?")[0]
+        result = await lookup(link)
+        if result:
+            return result["thumb"]
 
     async def video(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
@@ -643,21 +715,17 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            duration_min = result["duration"]
-            vidid = result["id"]
-            yturl = result["link"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
+        result = await lookup(link)
+        if not result:
+            raise ValueError(f"No YouTube result for {link}")
         track_details = {
-            "title": title,
-            "link": yturl,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
+            "title": result["title"],
+            "link": result["link"],
+            "vidid": result["id"],
+            "duration_min": result["duration"],
+            "thumb": result["thumb"],
         }
-        return track_details, vidid
+        return track_details, result["id"]
 
     async def formats(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
@@ -667,30 +735,35 @@ class YouTubeAPI:
         cookie_file = cookie_txt_file()
         if not cookie_file:
             return [], link
-        ytdl_opts = {"quiet": True, "cookiefile": cookie_file}
         # add proxy if available
-        proxy = choose_random_proxy(YTDLP_PROXY_POOL)
-        if proxy:
-            ytdl_opts["proxy"] = proxy
-        ydl = yt_dlp.YoutubeDL(ytdl_opts)
-        with ydl:
-            formats_available = []
-            r = ydl.extract_info(link, download=False)
-            for format in r["formats"]:
-                try:
-                    if "dash" not in str(format["format"]).lower():
-                        formats_available.append(
-                            {
-                                "format": format["format"],
-                                "filesize": format.get("filesize"),
-                                "format_id": format["format_id"],
-                                "ext": format["ext"],
-                                "format_note": format["format_note"],
-                                "yturl": link,
-                            }
-                        )
-                except:
-                    continue
+        proxy = ytdlp_proxies.pick()
+        formats_available = []
+        started = time.monotonic()
+        try:
+            stdout = await run_ytdlp(
+                ["-J", *base_args(cookie_file, proxy), link],
+                timeout=config.YTDLP_INFO_TIMEOUT,
+            )
+        except YtDlpError as e:
+            _report_ytdlp(cookie_file, proxy, started, str(e))
+            raise
+        _report_ytdlp(cookie_file, proxy, started)
+        r = json.loads(stdout)
+        for format in r["formats"]:
+            try:
+                if "dash" not in str(format["format"]).lower():
+                    formats_available.append(
+                        {
+                            "format": format["format"],
+                            "filesize": format.get("filesize"),
+                            "format_id": format["format_id"],
+                            "ext": format["ext"],
+                            "format_note": format["format_note"],
+                            "yturl": link,
+                        }
+                    )
+            except:
+                continue
         return formats_available, link
 
     async def slider(self, link: str, query_type: int, videoid: Union[bool, str] = None):
@@ -698,13 +771,8 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        a = VideosSearch(link, limit=10)
-        result = (await a.next()).get("result")
-        title = result[query_type]["title"]
-        duration_min = result[query_type]["duration"]
-        vidid = result[query_type]["id"]
-        thumbnail = result[query_type]["thumbnails"][0]["url"].split("?")[0]
-        return title, duration_min, thumbnail, vidid
+        result = (await lookup_many(link, 10))[query_type]
+        return result["title"], result["duration"], result["thumb"], result["id"]
 
     async def download(
         self,
@@ -722,21 +790,21 @@ class YouTubeAPI:
 
         try:
             if songvideo or songaudio:
-                downloaded_file = await download_song(link)
+                downloaded_file = await download_song(link, mystic)
                 if downloaded_file:
                     return downloaded_file, True
                 else:
                     return None, False
 
             elif video:
-                downloaded_file = await download_video(link)
+                downloaded_file = await download_video(link, mystic)
                 if downloaded_file:
                     return downloaded_file, True
                 else:
                     return None, False
 
             else:
-                downloaded_file = await download_song(link)
+                downloaded_file = await download_song(link, mystic)
                 if downloaded_file:
                     return downloaded_file, True
                 else:
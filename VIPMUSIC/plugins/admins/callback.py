@@ -1,5 +1,4 @@
 import asyncio
-import random
 from pyrogram.enums import ChatMemberStatus
 from pyrogram.errors import (
     ChatAdminRequired,
@@ -16,6 +15,7 @@ from VIPMUSIC.misc import SUDOERS, db
 from VIPMUSIC.utils.database import (
     get_active_chats,
     get_lang,
+    get_played,
     get_upvote_count,
     is_active_chat,
     is_music_playing,
@@ -26,11 +26,13 @@ from VIPMUSIC.utils.database import (
     mute_on,
     is_muted,
     set_loop,
+    start_clock,
 )
 from VIPMUSIC.utils.decorators.language import languageCB
 from VIPMUSIC.utils.formatters import seconds_to_min
 from VIPMUSIC.utils.inline import close_markup, stream_markup, stream_markup_timer, stream_markup2, stream_markup_timer2, panel_markup_5, track_markup, slider_markup, livestream_markup, playlist_markup, stream_markup, stream_markup_timer, telegram_markup, panel_markup_4, panel_markup_3, panel_markup_2, stream_markup_timer2, stream_markup2, queue_markup, panel_markup_1 
 from VIPMUSIC.utils.stream.autoclear import auto_clean
+from VIPMUSIC.utils.stream.prefetch import claim_download
 from VIPMUSIC.utils.thumbnails import get_thumb
 from config import BANNED_USERS, SOUNCLOUD_IMG_URL, STREAM_IMG_URL, TELEGRAM_AUDIO_URL, TELEGRAM_VIDEO_URL, adminlist, confirmer, votemode
 from strings import get_string
@@ -124,7 +126,7 @@ async def del_back_playlist(client, CallbackQuery, _):
             buttons = panel_markup_4(_,
                             playing[0]["vidid"],
                             chat_id,
-                            seconds_to_min(playing[0]["played"]),
+                            seconds_to_min(get_played(chat_id, playing[0]["seconds"])),
                             playing[0]["dur"],)
     try:
         await CallbackQuery.edit_message_reply_markup(
@@ -326,21 +328,12 @@ async def del_back_playlist(client, CallbackQuery, _):
             return await CallbackQuery.answer(
                 _["admin_42"], show_alert=True
             )
-        try:
-            popped = check.pop(0)
-        except:
-            return await CallbackQuery.answer(
-                _["admin_43"], show_alert=True
-            )
-        check = db.get(chat_id)
-        if not check:
-            check.insert(0, popped)
+        if len(check) < 2:
             return await CallbackQuery.answer(
                 _["admin_43"], show_alert=True
             )
         await CallbackQuery.answer()
-        random.shuffle(check)
-        check.insert(0, popped)
+        check.shuffle_upcoming()
         await CallbackQuery.message.reply_text(
             _["admin_44"].format(mention)
         )
@@ -391,7 +384,7 @@ async def del_back_playlist(client, CallbackQuery, _):
         streamtype = check[0]["streamtype"]
         videoid = check[0]["vidid"]
         status = True if str(streamtype) == "video" else None
-        db[chat_id][0]["played"] = 0
+        start_clock(chat_id)
         exis = (check[0]).get("old_dur")
         if exis:
             db[chat_id][0]["dur"] = exis
@@ -441,6 +434,8 @@ async def del_back_playlist(client, CallbackQuery, _):
                 )
             except:
                 return await mystic.edit_text(_["call_6"])
+            if direct:
+                claim_download(chat_id, queued, file_path)
             try:
                 image = await YouTube.thumbnail(videoid, True)
             except:
@@ -552,7 +547,7 @@ async def del_back_playlist(client, CallbackQuery, _):
             return await CallbackQuery.answer(
                 _["admin_22"], show_alert=True
             )
-        duration_played = int(playing[0]["played"])
+        duration_played = get_played(chat_id, playing[0]["seconds"])
         if int(command) in [1, 2]:
             duration_to_skip = 10
         else:
@@ -596,9 +591,9 @@ async def del_back_playlist(client, CallbackQuery, _):
         except:
             return await mystic.edit_text(_["admin_26"])
         if int(command) in [1, 3]:
-            db[chat_id][0]["played"] -= duration_to_skip
+            start_clock(chat_id, duration_played - duration_to_skip)
         else:
-            db[chat_id][0]["played"] += duration_to_skip
+            start_clock(chat_id, duration_played + duration_to_skip)
         string = _["admin_25"].format(seconds_to_min(to_seek))
         await mystic.edit_text(
             f"{string}\n\nᴄʜᴀɴɢᴇs ᴅᴏɴᴇ ʙʏ : {mention} !"
@@ -617,28 +612,18 @@ async def markup_timer():
                 duration_seconds = int(playing[0]["seconds"])
                 if duration_seconds == 0:
                     continue
-                try:
-                    mystic = playing[0]["markup"]
-                except:
+                mystic = playing[0]["mystic"]
+                markup = playing[0]["markup"]
+                if not mystic or not markup:
                     continue
                 try:
-                    check = checker[chat_id][mystic.id]
+                    check = checker[chat_id][mystic]
                     if check is False:
                         continue
                 except:
                     pass
                 try:
-                    language = await get_lang(chat_id)
-                    _ = get_string(language)
-                except:
-                    _ = get_string("en")
-                try:
-                    mystic = playing[0]["mystic"]
-                    markup = playing[0]["markup"]
-                except:
-                    continue
-                try:
-                    check = wrong[chat_id][mystic.id]
+                    check = wrong[chat_id][mystic]
                     if check is False:
                         continue
                 except:
@@ -654,19 +639,21 @@ async def markup_timer():
                             _,
                             playing[0]["vidid"],
                             chat_id,
-                            seconds_to_min(playing[0]["played"]),
+                            seconds_to_min(get_played(chat_id, playing[0]["seconds"])),
                             playing[0]["dur"],
                         )
                         if markup == "stream"
                         else stream_markup_timer2(
                             _,
                             chat_id,
-                            seconds_to_min(playing[0]["played"]),
+                            seconds_to_min(get_played(chat_id, playing[0]["seconds"])),
                             playing[0]["dur"],
                         )
                     )
-                    await mystic.edit_reply_markup(
-                        reply_markup=InlineKeyboardMarkup(buttons)
+                    await app.edit_message_reply_markup(
+                        playing[0]["chat_id"],
+                        mystic,
+                        reply_markup=InlineKeyboardMarkup(buttons),
                     )
                 except:
                     continue
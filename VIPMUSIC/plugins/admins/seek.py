@@ -5,6 +5,7 @@ from VIPMUSIC import YouTube, app
 from VIPMUSIC.core.call import VIP
 from VIPMUSIC.misc import db
 from VIPMUSIC.utils import AdminRightsCheck, seconds_to_min
+from VIPMUSIC.utils.database import get_played, start_clock
 from VIPMUSIC.utils.inline import close_markup
 from config import BANNED_USERS
 
@@ -29,7 +30,7 @@ async def seek_comm(cli, message: Message, _, chat_id):
     if duration_seconds == 0:
         return await message.reply_text(_["admin_22"])
     file_path = playing[0]["file"]
-    duration_played = int(playing[0]["played"])
+    duration_played = get_played(chat_id, playing[0]["seconds"])
     duration_to_skip = int(query)
     duration = playing[0]["dur"]
     if message.command[0][-2] == "c":
@@ -67,9 +68,9 @@ async def seek_comm(cli, message: Message, _, chat_id):
     except:
         return await mystic.edit_text(_["admin_26"], reply_markup=close_markup(_))
     if message.command[0][-2] == "c":
-        db[chat_id][0]["played"] -= duration_to_skip
+        start_clock(chat_id, duration_played - duration_to_skip)
     else:
-        db[chat_id][0]["played"] += duration_to_skip
+        start_clock(chat_id, duration_played + duration_to_skip)
     await mystic.edit_text(
         text=_["admin_25"].format(seconds_to_min(to_seek), message.from_user.mention),
         reply_markup=close_markup(_),
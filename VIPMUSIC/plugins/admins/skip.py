@@ -5,10 +5,11 @@ import config
 from VIPMUSIC import YouTube, app
 from VIPMUSIC.core.call import VIP
 from VIPMUSIC.misc import db
-from VIPMUSIC.utils.database import get_loop
+from VIPMUSIC.utils.database import get_loop, start_clock
 from VIPMUSIC.utils.decorators import AdminRightsCheck
 from VIPMUSIC.utils.inline import close_markup, stream_markup, stream_markup2
 from VIPMUSIC.utils.stream.autoclear import auto_clean
+from VIPMUSIC.utils.stream.prefetch import claim_download
 from VIPMUSIC.utils.thumbnails import get_thumb
 from config import BANNED_USERS
 
@@ -96,7 +97,7 @@ async def skip(cli, message: Message, _, chat_id):
     streamtype = check[0]["streamtype"]
     videoid = check[0]["vidid"]
     status = True if str(streamtype) == "video" else None
-    db[chat_id][0]["played"] = 0
+    start_clock(chat_id)
     exis = (check[0]).get("old_dur")
     if exis:
         db[chat_id][0]["dur"] = exis
@@ -140,6 +141,8 @@ async def skip(cli, message: Message, _, chat_id):
             )
         except:
             return await mystic.edit_text(_["call_6"])
+        if direct:
+            claim_download(chat_id, queued, file_path)
         try:
             image = await YouTube.thumbnail(videoid, True)
         except:
@@ -6,6 +6,8 @@ from pyrogram.enums import ChatType, ChatMemberStatus
 from pyrogram.errors import UserNotParticipant
 from pyrogram.types import ChatPermissions
 
+from VIPMUSIC.utils.usercache import remember_user
+
 print("[tagall] tagall, vctag")
 
 spam_chats = []
@@ -219,6 +221,7 @@ async def mentionall(client, message):
     async for usr in client.get_chat_members(chat_id):
         if not chat_id in spam_chats:
             break
+        remember_user(usr.user)
         if usr.user.is_bot:
             continue
         usrnum += 1
@@ -266,6 +269,7 @@ async def mention_allvc(client, message):
     async for usr in client.get_chat_members(chat_id):
         if not chat_id in spam_chats:
             break
+        remember_user(usr.user)
         if usr.user.is_bot:
             continue
         usrnum += 1
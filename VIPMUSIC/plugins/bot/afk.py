@@ -5,6 +5,7 @@ from pyrogram.types import Message
 from VIPMUSIC import app
 from VIPMUSIC.mongo.readable_time import get_readable_time
 from VIPMUSIC.mongo.afkdb import add_afk, is_afk, remove_afk
+from VIPMUSIC.utils import usercache
 
 print("[afk] afk")
 
@@ -281,7 +282,7 @@ async def chat_watcher_func(_, message):
                 found = re.findall("@([_0-9a-zA-Z]+)", message.text)
                 try:
                     get_user = found[j]
-                    user = await app.get_users(get_user)
+                    user = await usercache.get_user(get_user)
                     if user.id == replied_user_id:
                         j += 1
                         continue
@@ -13,6 +13,7 @@ from VIPMUSIC.utils.database import (
     add_nonadmin_chat,
     get_authuser,
     get_authuser_names,
+    get_chat_settings,
     get_playmode,
     get_playtype,
     get_upvote_count,
@@ -139,18 +140,16 @@ async def without_Admin_rights(client, CallbackQuery, _):
             await CallbackQuery.answer(_["set_cb_2"], show_alert=True)
         except:
             pass
-        playmode = await get_playmode(CallbackQuery.message.chat.id)
-        if playmode == "Direct":
+        settings = await get_chat_settings(CallbackQuery.message.chat.id)
+        if settings["playmode"] == "Direct":
             Direct = True
         else:
             Direct = None
-        is_non_admin = await is_nonadmin_chat(CallbackQuery.message.chat.id)
-        if not is_non_admin:
+        if not settings["nonadmin"]:
             Group = True
         else:
             Group = None
-        playty = await get_playtype(CallbackQuery.message.chat.id)
-        if playty == "Everyone":
+        if settings["playtype"] == "Everyone":
             Playtype = None
         else:
             Playtype = True
@@ -166,9 +165,8 @@ async def without_Admin_rights(client, CallbackQuery, _):
         else:
             buttons = auth_users_markup(_)
     if command == "VM":
-        mode = await is_skipmode(CallbackQuery.message.chat.id)
-        current = await get_upvote_count(CallbackQuery.message.chat.id)
-        buttons = vote_mode_markup(_, current, mode)
+        settings = await get_chat_settings(CallbackQuery.message.chat.id)
+        buttons = vote_mode_markup(_, settings["upvotes"], settings["skipmode"])
     try:
         return await CallbackQuery.edit_message_reply_markup(
             reply_markup=InlineKeyboardMarkup(buttons)
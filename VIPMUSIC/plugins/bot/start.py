@@ -5,7 +5,6 @@ import random
 from pyrogram import filters
 from pyrogram.enums import ChatType
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
-from youtubesearchpython.__future__ import VideosSearch
 from pyrogram.errors import UserAlreadyParticipant, UserNotParticipant
 import config
 from config import BANNED_USERS, GREET, MENTION_USERNAMES, START_REACTIONS, YUMI_PICS
@@ -24,6 +23,7 @@ from VIPMUSIC.utils.database import (
 from VIPMUSIC.utils.decorators.language import LanguageStart
 from VIPMUSIC.utils.formatters import get_readable_time
 from VIPMUSIC.utils.inline import first_page, private_panel, start_panel
+from VIPMUSIC.utils.videometa import lookup
 from VIPMUSIC.utils.database import get_assistant
 from VIPMUSIC.utils.extraction import extract_user
 from strings import get_string
@@ -104,17 +104,16 @@ async def start_pm(client, message: Message, _):
             m = await message.reply_text("🔎")
             query = (str(name)).replace("info_", "", 1)
             query = f"https://www.youtube.com/watch?v={query}"
-            results = VideosSearch(query, limit=1)
-
-            for result in (await results.next())["result"]:
-                title = result["title"]
-                duration = result["duration"]
-                views = result["viewCount"]["short"]
-                thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-                channellink = result["channel"]["link"]
-                channel = result["channel"]["name"]
-                link = result["link"]
-                published = result["publishedTime"]
+            result = await lookup(query)
+            title = result["title"]
+            duration = result["duration"]
+            views = result["views"]
+            thumbnail = result["thumb"]
+            # Entries cached before these fields were kept lack them.
+            channellink = result.get("channel_link") or "https://www.youtube.com"
+            channel = result["channel"]
+            link = result["link"]
+            published = result.get("published") or "-"
 
             searched_text = _["start_6"].format(
                 title, duration, views, published, channellink, channel, app.mention
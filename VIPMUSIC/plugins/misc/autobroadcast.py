@@ -2,6 +2,7 @@ import asyncio
 import datetime
 from VIPMUSIC import app
 from pyrogram import Client
+from VIPMUSIC.utils.broadcaster import run_broadcast
 from VIPMUSIC.utils.database import get_served_chats
 from config import START_IMG_URL, AUTO_GCAST_MSG, AUTO_GCAST, LOGGER_ID, SUPPORT_CHAT
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
@@ -31,18 +32,16 @@ async def send_text_once():
     except Exception as e:
         pass
 
+async def _send_photo(chat_id):
+    await app.send_photo(chat_id, photo=START_IMG_URL, caption=caption, reply_markup=BUTTONS)
+
 async def send_message_to_chats():
     try:
         chats = await get_served_chats()
-
-        for chat_info in chats:
-            chat_id = chat_info.get('chat_id')
-            if isinstance(chat_id, int):  # Check if chat_id is an integer
-                try:
-                    await app.send_photo(chat_id, photo=START_IMG_URL, caption=caption, reply_markup=BUTTONS)
-                    await asyncio.sleep(20)  # Sleep for 100 second between sending messages
-                except Exception as e:
-                    pass  # Do nothing if an error occurs while sending message
+        chat_ids = [chat_info.get('chat_id') for chat_info in chats]
+        chat_ids = [chat_id for chat_id in chat_ids if isinstance(chat_id, int)]  # Check if chat_id is an integer
+        # Paced and checkpointed by the broadcast engine, a restart resumes the round
+        await run_broadcast("autogcast", chat_ids, _send_photo)
     except Exception as e:
         pass  # Do nothing if an error occurs while fetching served chats
 
@@ -1,74 +1,46 @@
-import asyncio
-from datetime import datetime
-
 from pyrogram.enums import ChatType
 
 import config
-from VIPMUSIC import app
-from VIPMUSIC.core.call import VIP, autoend
-from VIPMUSIC.utils.database import get_client, is_active_chat, is_autoend
-
-
-async def auto_leave():
-    if config.AUTO_LEAVING_ASSISTANT:
-        while not await asyncio.sleep(900):
-            from VIPMUSIC.core.userbot import assistants
-
-            for num in assistants:
-                client = await get_client(num)
-                left = 0
-                try:
-                    async for i in client.get_dialogs():
-                        if i.chat.type in [
-                            ChatType.SUPERGROUP,
-                            ChatType.GROUP,
-                            ChatType.CHANNEL,
-                        ]:
-                            if (
-                                i.chat.id != config.LOGGER_ID
-                                and i.chat.id != -1001735663878
-                                and i.chat.id != -1001735663878
-                            ):
-                                if left == 20:
-                                    continue
-                                if not await is_active_chat(i.chat.id):
-                                    try:
-                                        await client.leave_chat(i.chat.id)
-                                        left += 1
-                                    except:
-                                        continue
-                except:
-                    pass
+from VIPMUSIC.utils.database import get_client, is_active_chat
+from VIPMUSIC.utils.timers import schedule
 
 
-asyncio.create_task(auto_leave())
+# Seconds between sweeps that make idle assistants leave their chats
+AUTO_LEAVE_INTERVAL = 900
 
 
-async def auto_end():
-    while not await asyncio.sleep(5):
-        ender = await is_autoend()
-        if not ender:
-            continue
-        for chat_id in autoend:
-            timer = autoend.get(chat_id)
-            if not timer:
-                continue
-            if datetime.now() > timer:
-                if not await is_active_chat(chat_id):
-                    autoend[chat_id] = {}
-                    continue
-                autoend[chat_id] = {}
-                try:
-                    await VIP.stop_stream(chat_id)
-                except:
-                    continue
-                try:
-                    await app.send_message(
-                        chat_id,
-                        "» ʙᴏᴛ ᴀᴜᴛᴏᴍᴀᴛɪᴄᴀʟʟʏ ʟᴇғᴛ ᴠɪᴅᴇᴏᴄʜᴀᴛ ʙᴇᴄᴀᴜsᴇ ɴᴏ ᴏɴᴇ ᴡᴀs ʟɪsᴛᴇɴɪɴɢ ᴏɴ ᴠɪᴅᴇᴏᴄʜᴀᴛ.",
-                    )
-                except:
-                    continue
+async def auto_leave():
+    from VIPMUSIC.core.userbot import assistants
+
+    try:
+        for num in assistants:
+            client = await get_client(num)
+            left = 0
+            try:
+                async for i in client.get_dialogs():
+                    if i.chat.type in [
+                        ChatType.SUPERGROUP,
+                        ChatType.GROUP,
+                        ChatType.CHANNEL,
+                    ]:
+                        if (
+                            i.chat.id != config.LOGGER_ID
+                            and i.chat.id != -1001735663878
+                            and i.chat.id != -1001735663878
+                        ):
+                            if left == 20:
+                                break
+                            if not await is_active_chat(i.chat.id):
+                                try:
+                                    await client.leave_chat(i.chat.id)
+                                    left += 1
+                                except:
+                                    continue
+            except:
+                pass
+    finally:
+        schedule("autoleave", AUTO_LEAVE_INTERVAL, auto_leave)
 
 
-asyncio.create_task(auto_end())
+if config.AUTO_LEAVING_ASSISTANT:
+    schedule("autoleave", AUTO_LEAVE_INTERVAL, auto_leave)
@@ -6,20 +6,82 @@ from pyrogram.errors import FloodWait
 
 from VIPMUSIC import app
 from VIPMUSIC.misc import SUDOERS
+from VIPMUSIC.utils.broadcaster import enqueue, run_broadcast, unfinished
 from VIPMUSIC.utils.database import (
     get_active_chats,
     get_authuser_names,
     get_client,
+    get_lang,
     get_served_chats,
     get_served_users,
 )
 from VIPMUSIC.utils.decorators.language import language
-from VIPMUSIC.utils.formatters import alpha_to_int
+from VIPMUSIC.utils.formatters import alpha_to_int, seconds_to_min
 from config import adminlist
+from strings import get_string
 
 IS_BROADCASTING = False
 
 
+async def _targets(kind: str) -> list:
+    if kind == "users":
+        return [int(user["user_id"]) for user in await get_served_users()]
+    return [int(chat["chat_id"]) for chat in await get_served_chats()]
+
+
+def _sender(payload: dict, pin: bool):
+    async def send(chat_id):
+        m = (
+            await app.forward_messages(
+                chat_id, payload["from_chat"], payload["message_id"]
+            )
+            if payload["message_id"]
+            else await app.send_message(chat_id, text=payload["text"])
+        )
+        if pin and payload["pin"]:
+            try:
+                await m.pin(disable_notification=payload["pin"] != "loud")
+                return "pinned"
+            except:
+                pass
+
+    return send
+
+
+async def _broadcast(job: str, payload: dict, status, _):
+    kind = job.rsplit(":", 1)[1]
+
+    async def progress(state):
+        await status.edit_text(
+            _["broad_9"].format(
+                kind,
+                state["sent"] + state["failed"],
+                state["total"],
+                state["sent"],
+                state["failed"],
+                seconds_to_min(state["eta"]),
+            )
+        )
+
+    state = await run_broadcast(
+        job,
+        await _targets(kind),
+        _sender(payload, kind == "chats"),
+        payload,
+        progress if status else None,
+    )
+    try:
+        if kind == "chats":
+            await app.send_message(
+                payload["chat_id"],
+                _["broad_3"].format(state["sent"], state.get("pinned", 0)),
+            )
+        else:
+            await app.send_message(payload["chat_id"], _["broad_4"].format(state["sent"]))
+    except:
+        pass
+
+
 @app.on_message(filters.command(["broadcast", "gcast"]) & SUDOERS)
 @language
 async def braodcast_message(client, message, _):
@@ -27,9 +89,11 @@ async def braodcast_message(client, message, _):
     if message.reply_to_message:
         x = message.reply_to_message.id
         y = message.chat.id
+        query = None
     else:
         if len(message.command) < 2:
             return await message.reply_text(_["broad_2"])
+        x = y = None
         query = message.text.split(None, 1)[1]
         if "-pin" in query:
             query = query.replace("-pin", "")
@@ -45,74 +109,30 @@ async def braodcast_message(client, message, _):
             return await message.reply_text(_["broad_8"])
 
     IS_BROADCASTING = True
-    await message.reply_text(_["broad_1"])
+    status = await message.reply_text(_["broad_1"])
 
+    payload = {
+        "chat_id": message.chat.id,
+        "from_chat": y,
+        "message_id": x,
+        "text": query,
+        "pin": "loud"
+        if "-pinloud" in message.text
+        else "quiet"
+        if "-pin" in message.text
+        else None,
+    }
+    # Both jobs are checkpointed up front so a restart finishes whichever
+    # one was still pending, see resume_broadcasts.
+    jobs = []
     if "-nobot" not in message.text:
-        sent = 0
-        pin = 0
-        chats = []
-        schats = await get_served_chats()
-        for chat in schats:
-            chats.append(int(chat["chat_id"]))
-        for i in chats:
-            try:
-                m = (
-                    await app.forward_messages(i, y, x)
-                    if message.reply_to_message
-                    else await app.send_message(i, text=query)
-                )
-                if "-pin" in message.text:
-                    try:
-                        await m.pin(disable_notification=True)
-                        pin += 1
-                    except:
-                        continue
-                elif "-pinloud" in message.text:
-                    try:
-                        await m.pin(disable_notification=False)
-                        pin += 1
-                    except:
-                        continue
-                sent += 1
-                await asyncio.sleep(0.2)
-            except FloodWait as fw:
-                flood_time = int(fw.value)
-                if flood_time > 200:
-                    continue
-                await asyncio.sleep(flood_time)
-            except:
-                continue
-        try:
-            await message.reply_text(_["broad_3"].format(sent, pin))
-        except:
-            pass
-
+        jobs.append(f"gcast:{message.chat.id}:{message.id}:chats")
     if "-user" in message.text:
-        susr = 0
-        served_users = []
-        susers = await get_served_users()
-        for user in susers:
-            served_users.append(int(user["user_id"]))
-        for i in served_users:
-            try:
-                m = (
-                    await app.forward_messages(i, y, x)
-                    if message.reply_to_message
-                    else await app.send_message(i, text=query)
-                )
-                susr += 1
-                await asyncio.sleep(0.2)
-            except FloodWait as fw:
-                flood_time = int(fw.value)
-                if flood_time > 200:
-                    continue
-                await asyncio.sleep(flood_time)
-            except:
-                pass
-        try:
-            await message.reply_text(_["broad_4"].format(susr))
-        except:
-            pass
+        jobs.append(f"gcast:{message.chat.id}:{message.id}:users")
+    for job in jobs:
+        await enqueue(job, payload)
+    for job in jobs:
+        await _broadcast(job, payload, status, _)
 
     if "-assistant" in message.text:
         aw = await message.reply_text(_["broad_5"])
@@ -166,4 +186,30 @@ async def auto_clean():
             continue
 
 
+async def resume_broadcasts():
+    """Finish the /broadcast jobs a restart interrupted."""
+    global IS_BROADCASTING
+    try:
+        jobs = await unfinished("gcast:")
+    except Exception:
+        return
+    for doc in jobs:
+        payload = doc["payload"]
+        IS_BROADCASTING = True
+        try:
+            _ = get_string(await get_lang(payload["chat_id"]))
+        except:
+            _ = get_string("en")
+        try:
+            status = await app.send_message(payload["chat_id"], _["broad_10"])
+        except:
+            status = None
+        try:
+            await _broadcast(doc["_id"], payload, status, _)
+        except Exception:
+            continue
+    IS_BROADCASTING = False
+
+
 asyncio.create_task(auto_clean())
+asyncio.create_task(resume_broadcasts())
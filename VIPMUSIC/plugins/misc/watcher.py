@@ -3,12 +3,21 @@ from pyrogram.types import Message
 
 from VIPMUSIC import app
 from VIPMUSIC.core.call import VIP
+from VIPMUSIC.utils.usercache import remember_user
 
 welcome = 20
 close = 30
+profiles = 40
 
 
 @app.on_message(filters.video_chat_started, group=welcome)
 @app.on_message(filters.video_chat_ended, group=close)
 async def welcome(_, message: Message):
     await VIP.stop_stream_force(message.chat.id)
+
+
+@app.on_message(group=profiles)
+async def profile_watcher(_, message: Message):
+    remember_user(message.from_user)
+    if message.reply_to_message:
+        remember_user(message.reply_to_message.from_user)
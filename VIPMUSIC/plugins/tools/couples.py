@@ -10,6 +10,7 @@ from pyrogram.enums import *
 # BOT FILE NAME
 from VIPMUSIC import app
 from VIPMUSIC.mongo.couples_db import _get_image, get_couple, save_couple
+from VIPMUSIC.utils.usercache import get_user, get_users, remember_user
 
 print("[Couples] couples")
 
@@ -47,6 +48,7 @@ async def ctest(_, message):
             list_of_users = []
 
             async for i in app.get_chat_members(message.chat.id, limit=50):
+                remember_user(i.user)
                 if not i.user.is_bot:
                     list_of_users.append(i.user.id)
 
@@ -61,8 +63,8 @@ async def ctest(_, message):
             photo1 = (await app.get_chat(c1_id)).photo
             photo2 = (await app.get_chat(c2_id)).photo
 
-            N1 = (await app.get_users(c1_id)).mention
-            N2 = (await app.get_users(c2_id)).mention
+            N1 = (await get_user(c1_id)).mention
+            N2 = (await get_user(c2_id)).mention
 
             try:
                 p1 = await app.download_media(photo1.big_file_id, file_name="pfp1.png")
@@ -119,8 +121,9 @@ async def ctest(_, message):
             b = await _get_image(cid)
             c1_id = int(is_selected["c1_id"])
             c2_id = int(is_selected["c2_id"])
-            c1_name = (await app.get_users(c1_id)).first_name
-            c2_name = (await app.get_users(c2_id)).first_name
+            users = await get_users([c1_id, c2_id])
+            c1_name = users[c1_id].first_name
+            c2_name = users[c2_id].first_name
 
             TXT = f"""
 **<blockquote>𝐓ᴏᴅᴀʏ's 𝐒ᴇʟᴇᴄᴛᴇᴅ 𝐂ᴏᴜᴘʟᴇs 🎉</blockquote>
@@ -1,7 +1,7 @@
 from pyrogram import Client, filters
-from youtubesearchpython.__future__ import VideosSearch
 
 from VIPMUSIC import app
+from VIPMUSIC.utils.videometa import lookup
 
 print("[get_thumb] getthumb")
 # Command handler for /getthumbnail
@@ -11,11 +11,9 @@ async def get_thumbnail_command(client, message):
         # Extract video ID from the command
         video_id = message.text.split(maxsplit=1)[1]
         
-        # Search for the video using video ID
+        # Look the video up by ID, usually already cached
         query = f"https://www.youtube.com/watch?v={video_id}"
-        results = VideosSearch(query, limit=1)
-        for result in (await results.next())["result"]:
-            thumbnail_url = result["thumbnails"][0]["url"].split("?")[0]
+        thumbnail_url = (await lookup(query))["thumb"]
         
         # Send the thumbnail as a photo
         await message.reply_photo(thumbnail_url)
@@ -9,7 +9,12 @@ import config
 from VIPMUSIC import app
 from VIPMUSIC.misc import db
 from VIPMUSIC.utils import VIPBin, get_channeplayCB, seconds_to_min
-from VIPMUSIC.utils.database import get_cmode, is_active_chat, is_music_playing
+from VIPMUSIC.utils.database import (
+    get_cmode,
+    get_played,
+    is_active_chat,
+    is_music_playing,
+)
 from VIPMUSIC.utils.decorators.language import language, languageCB
 from VIPMUSIC.utils.inline import queue_back_markup, queue_markup
 from config import BANNED_USERS
@@ -94,7 +99,7 @@ async def get_queue(client, message: Message, _):
             DUR,
             "c" if cplay else "g",
             videoid,
-            seconds_to_min(got[0]["played"]),
+            seconds_to_min(get_played(chat_id, got[0]["seconds"])),
             got[0]["dur"],
         )
     )
@@ -113,7 +118,7 @@ async def get_queue(client, message: Message, _):
                                     DUR,
                                     "c" if cplay else "g",
                                     videoid,
-                                    seconds_to_min(db[chat_id][0]["played"]),
+                                    seconds_to_min(get_played(chat_id, db[chat_id][0]["seconds"])),
                                     db[chat_id][0]["dur"],
                                 )
                                 await mystic.edit_reply_markup(reply_markup=buttons)
@@ -234,7 +239,7 @@ async def queue_back(client, CallbackQuery: CallbackQuery, _):
             DUR,
             cplay,
             videoid,
-            seconds_to_min(got[0]["played"]),
+            seconds_to_min(get_played(chat_id, got[0]["seconds"])),
             got[0]["dur"],
         )
     )
@@ -255,7 +260,7 @@ async def queue_back(client, CallbackQuery: CallbackQuery, _):
                                     DUR,
                                     cplay,
                                     videoid,
-                                    seconds_to_min(db[chat_id][0]["played"]),
+                                    seconds_to_min(get_played(chat_id, db[chat_id][0]["seconds"])),
                                     db[chat_id][0]["dur"],
                                 )
                                 await mystic.edit_reply_markup(reply_markup=buttons)
@@ -1,6 +1,7 @@
 import asyncio
 import datetime
-from typing import Dict, List, Tuple
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
 from pyrogram import filters
@@ -11,8 +12,10 @@ from pyrogram.types import (
     CallbackQuery,
 )
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 
 from VIPMUSIC import app
+from VIPMUSIC.utils.usercache import display_name, get_users
 from config import (
     MONGO_DB_URI,
     RANKING_PIC,
@@ -45,46 +48,255 @@ ranking_db = db["ranking"]  # docs: { _id: user_id, total_messages, weekly_messa
 today_counts: Dict[int, Dict[int, int]] = {}
 last_reset_date = None  # date in IST
 
+# -------------------------------------------------------------------
+# PENDING INCREMENTS (RAM, flushed to DB in batches)
+# -------------------------------------------------------------------
+FLUSH_INTERVAL = 10  # seconds between flushes
+FLUSH_MAX_USERS = 500  # flush early once this many users are pending
+RANK_FIELDS = ("total_messages", "weekly_messages", "monthly_messages")
+
+pending_counts: Dict[int, int] = {}
+flush_lock = asyncio.Lock()
+flush_stats = {"flushes": 0, "messages": 0, "writes": 0}
+
+# -------------------------------------------------------------------
+# LEADERBOARDS (RAM, top K per field)
+# -------------------------------------------------------------------
+TOP_K = 200
+
+
+class Leaderboard:
+    """
+    Top ``k`` users of one counter field as a bisect-sorted list of
+    (-count, user_id). Users outside the top k are only tracked by how much
+    they grew since the last load, which bounds how high they can be.
+    """
+
+    def __init__(self, field: str, k: int = TOP_K):
+        self.field = field
+        self.k = k
+        self.clear()
+
+    def clear(self):
+        self.keys: List[Tuple[int, int]] = []
+        self.counts: Dict[int, int] = {}
+        self.outside: Dict[int, int] = {}
+        self.outside_max = 0
+        self.floor = 0
+        self.complete = False  # True when every user in the DB is a member
+        self.loaded = False
+
+    def set(self, counts: Dict[int, int], complete: bool):
+        self.clear()
+        keys = sorted((-count, user_id) for user_id, count in counts.items())
+        self.complete = complete and len(keys) <= self.k
+        self.keys = keys[: self.k]
+        self.counts = {user_id: -neg for neg, user_id in self.keys}
+        if not self.complete and self.keys:
+            self.floor = -self.keys[-1][0]
+        self.loaded = True
+
+    def bump(self, user_id: int, delta: int = 1):
+        if not self.loaded:
+            return
+        count = self.counts.get(user_id)
+        if count is None:
+            if not self.complete:
+                grown = self.outside.get(user_id, 0) + delta
+                self.outside[user_id] = grown
+                self.outside_max = max(self.outside_max, grown)
+                return
+            count = 0
+        else:
+            del self.keys[bisect_left(self.keys, (-count, user_id))]
+        self.counts[user_id] = count + delta
+        insort(self.keys, (-(count + delta), user_id))
+
+    def ceiling(self) -> int:
+        """Highest count any non-member could have right now."""
+        return self.floor + self.outside_max
+
+    def top(self, limit: int) -> Optional[List[Tuple[int, int]]]:
+        """(user_id, count) pairs, or None when the answer is not certain."""
+        if not self.loaded or limit > self.k:
+            return None
+        top = self.keys[:limit]
+        if not self.complete:
+            if len(top) < limit or self.ceiling() > -top[-1][0]:
+                return None
+        return [(user_id, -neg) for neg, user_id in top]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """1-based rank, or None when it can't be answered from memory."""
+        count = self.counts.get(user_id)
+        if not self.loaded or count is None:
+            return None
+        if not self.complete and self.ceiling() > count:
+            return None
+        return bisect_left(self.keys, (-count,)) + 1
+
+
+leaderboards = {field: Leaderboard(field) for field in RANK_FIELDS}
+
 # -------------------------------------------------------------------
 # DB HELPERS
 # -------------------------------------------------------------------
-async def db_inc_user_messages(user_id: int) -> None:
-    """Increment total/weekly/monthly for a user."""
-    await ranking_db.update_one(
-        {"_id": user_id},
-        {"$inc": {"total_messages": 1, "weekly_messages": 1, "monthly_messages": 1}},
-        upsert=True,
-    )
+def db_inc_user_messages(user_id: int) -> None:
+    """Queue one message for a user; written to DB by the next flush."""
+    pending_counts[user_id] = pending_counts.get(user_id, 0) + 1
+    for board in leaderboards.values():
+        board.bump(user_id)
+    if len(pending_counts) >= FLUSH_MAX_USERS and not flush_lock.locked():
+        asyncio.create_task(flush_pending_counts())
+
+
+async def flush_pending_counts() -> None:
+    """Write all pending increments as one unordered bulk_write."""
+    global pending_counts
+    async with flush_lock:
+        if not pending_counts:
+            return
+        batch, pending_counts = pending_counts, {}
+        ops = [
+            UpdateOne(
+                {"_id": user_id},
+                {"$inc": {field: count for field in RANK_FIELDS}},
+                upsert=True,
+            )
+            for user_id, count in batch.items()
+        ]
+        try:
+            await ranking_db.bulk_write(ops, ordered=False)
+        except Exception as e:
+            # put the batch back so nothing is lost; next flush retries it
+            for user_id, count in batch.items():
+                pending_counts[user_id] = pending_counts.get(user_id, 0) + count
+            print(f"[ranking] flush failed for {len(batch)} users: {e}")
+            return
+        flush_stats["flushes"] += 1
+        flush_stats["messages"] += sum(batch.values())
+        flush_stats["writes"] += len(ops)
+
+
+def writes_saved() -> int:
+    """Number of single-message DB writes avoided by coalescing."""
+    return flush_stats["messages"] - flush_stats["writes"]
+
+
+async def pending_flusher():
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        try:
+            await flush_pending_counts()
+        except Exception as e:
+            print(f"[ranking] flusher error: {e}")
+
+
+asyncio.create_task(pending_flusher())
+
+
+async def load_leaderboard(board: Leaderboard) -> None:
+    """Rebuild a leaderboard from DB top K plus every unflushed delta."""
+    field = board.field
+    # holding flush_lock keeps DB + pending_counts consistent while we read
+    async with flush_lock:
+        cursor = ranking_db.find({}, {field: 1}).sort(field, -1).limit(board.k)
+        rows = await cursor.to_list(length=board.k)
+        counts = {row["_id"]: int(row.get(field, 0)) for row in rows}
+        # pending users outside the DB top K need their stored count too;
+        # loop because more users can start pending while we await
+        while True:
+            missing = [uid for uid in pending_counts if uid not in counts]
+            if not missing:
+                break
+            for uid in missing:
+                counts[uid] = 0
+            async for row in ranking_db.find({"_id": {"$in": missing}}, {field: 1}):
+                counts[row["_id"]] = int(row.get(field, 0))
+        for user_id, count in pending_counts.items():
+            counts[user_id] += count
+        board.set(counts, complete=len(rows) < board.k)
+
+
+async def ensure_rank_indexes() -> None:
+    """Create the sort indexes used by ranking queries and warm the leaderboards."""
+    for field in RANK_FIELDS:
+        try:
+            await ranking_db.create_index([(field, -1), ("_id", 1)])
+        except Exception as e:
+            print(f"[ranking] index creation failed for {field}: {e}")
+    for board in leaderboards.values():
+        try:
+            await load_leaderboard(board)
+        except Exception as e:
+            print(f"[ranking] leaderboard load failed for {board.field}: {e}")
+
+
+asyncio.create_task(ensure_rank_indexes())
 
 
 async def db_get_top(field: str = "total_messages", limit: int = 10) -> List[dict]:
-    """Return top documents sorted by provided field."""
-    cursor = ranking_db.find().sort(field, -1).limit(limit)
-    return await cursor.to_list(length=limit)
+    """Return top documents sorted by provided field, including unflushed counts."""
+    board = leaderboards[field]
+    top = board.top(limit)
+    if top is None and limit <= board.k:
+        await load_leaderboard(board)
+        top = board.top(limit)
+    if top is not None:
+        return [{"_id": user_id, field: count} for user_id, count in top]
+    # holding flush_lock keeps DB + pending_counts consistent while we read
+    async with flush_lock:
+        pending = dict(pending_counts)
+        cursor = ranking_db.find().sort(field, -1).limit(limit)
+        rows = {row["_id"]: row for row in await cursor.to_list(length=limit)}
+        if pending:
+            async for row in ranking_db.find({"_id": {"$in": list(pending)}}):
+                rows[row["_id"]] = row
+    for user_id, count in pending.items():
+        row = rows.setdefault(user_id, {"_id": user_id})
+        row[field] = int(row.get(field, 0)) + count
+    top = sorted(rows.values(), key=lambda row: int(row.get(field, 0)), reverse=True)
+    return top[:limit]
 
 
 async def db_reset_field(field: str) -> None:
     """Reset a numeric field to 0 for all users."""
+    await flush_pending_counts()
     await ranking_db.update_many({}, {"$set": {field: 0}})
+    leaderboards[field].clear()
 
 
 async def db_get_user_counts(user_id: int) -> Tuple[int, int, int]:
     """Return (total, weekly, monthly) counts for a user (0 if not present)."""
-    doc = await ranking_db.find_one({"_id": user_id})
-    if not doc:
-        return 0, 0, 0
-    return (
-        int(doc.get("total_messages", 0)),
-        int(doc.get("weekly_messages", 0)),
-        int(doc.get("monthly_messages", 0)),
-    )
+    counts = [leaderboards[field].counts.get(user_id) for field in RANK_FIELDS]
+    if None not in counts:
+        return tuple(counts)
+    async with flush_lock:
+        doc = await ranking_db.find_one({"_id": user_id}) or {}
+        extra = pending_counts.get(user_id, 0)
+    return tuple(int(doc.get(field, 0)) + extra for field in RANK_FIELDS)
 
 
 async def db_get_rank_for_field(user_id: int, field: str) -> int:
-    """Return 1-based rank of user for given field."""
-    doc = await ranking_db.find_one({"_id": user_id})
-    user_val = int(doc.get(field, 0)) if doc else 0
-    greater = await ranking_db.count_documents({field: {"$gt": user_val}})
+    """Return 1-based rank of user for given field, including unflushed counts."""
+    rank = leaderboards[field].rank(user_id)
+    if rank is not None:
+        return rank
+    async with flush_lock:
+        pending = dict(pending_counts)
+        doc = await ranking_db.find_one({"_id": user_id})
+        user_val = (int(doc.get(field, 0)) if doc else 0) + pending.get(user_id, 0)
+        # users without pending counts are ranked straight from the DB ...
+        greater = await ranking_db.count_documents(
+            {field: {"$gt": user_val}, "_id": {"$nin": list(pending)}}
+        )
+        # ... the rest with their pending delta added on
+        if pending:
+            async for row in ranking_db.find({"_id": {"$in": list(pending)}}):
+                pending[row["_id"]] += int(row.get(field, 0))
+    greater += sum(
+        1 for uid, val in pending.items() if uid != user_id and val > user_val
+    )
     return greater + 1
 
 
@@ -126,27 +338,16 @@ async def global_watcher(_, message: Message):
     """Increment DB counters for global / weekly / monthly."""
     if not message.from_user:
         return
-    user_id = message.from_user.id
-    try:
-        await db_inc_user_messages(user_id)
-    except Exception as e:
-        # don't raise — log and continue
-        print(f"[ranking] DB increment error for {user_id}: {e}")
+    db_inc_user_messages(message.from_user.id)
 
 
 # -------------------------------------------------------------------
 # RESOLVE USERNAMES
 # -------------------------------------------------------------------
-async def resolve_name(user_id: int) -> str:
-    try:
-        u = await app.get_users(user_id)
-        if getattr(u, "first_name", None):
-            return u.first_name
-        if getattr(u, "username", None):
-            return u.username
-        return str(user_id)
-    except Exception:
-        return str(user_id)
+async def resolve_names(user_ids: List[int]) -> Dict[int, str]:
+    """Names for a whole leaderboard with at most one get_users call."""
+    users = await get_users(user_ids)
+    return {uid: display_name(users.get(uid), uid) for uid in user_ids}
 
 
 def format_leaderboard(title: str, items: List[Tuple[str, int]]) -> str:
@@ -167,10 +368,8 @@ async def cmd_today(_, message: Message):
         return await message.reply_text("No data available for today.")
 
     pairs = sorted(today_counts[chat_id].items(), key=lambda x: x[1], reverse=True)[:10]
-    items = []
-    for uid, cnt in pairs:
-        name = await resolve_name(uid)
-        items.append((name, cnt))
+    names = await resolve_names([uid for uid, cnt in pairs])
+    items = [(names[uid], cnt) for uid, cnt in pairs]
 
     text = format_leaderboard("Leaderboard Today", items)
     kb = InlineKeyboardMarkup([[InlineKeyboardButton("Overall", callback_data="overall")]])
@@ -186,10 +385,8 @@ async def cmd_ranking(_, message: Message):
     if not top:
         return await message.reply_text("No ranking data available.")
 
-    items = []
-    for row in top:
-        name = await resolve_name(row["_id"])
-        items.append((name, int(row.get("total_messages", 0))))
+    names = await resolve_names([row["_id"] for row in top])
+    items = [(names[row["_id"]], int(row.get("total_messages", 0))) for row in top]
 
     text = format_leaderboard("Leaderboard (Global)", items)
     kb = InlineKeyboardMarkup([[InlineKeyboardButton("Today", callback_data="today")]])
@@ -222,10 +419,8 @@ async def cmd_weeklyrank(_, message: Message):
     if not top:
         return await message.reply_text("No weekly ranking data available.")
 
-    items = []
-    for row in top:
-        name = await resolve_name(row["_id"])
-        items.append((name, int(row.get("weekly_messages", 0))))
+    names = await resolve_names([row["_id"] for row in top])
+    items = [(names[row["_id"]], int(row.get("weekly_messages", 0))) for row in top]
 
     text = format_leaderboard("Leaderboard (Weekly)", items)
     kb = InlineKeyboardMarkup([[InlineKeyboardButton("Today", callback_data="today")]])
@@ -241,10 +436,8 @@ async def cmd_monthlyrank(_, message: Message):
     if not top:
         return await message.reply_text("No monthly ranking data available.")
 
-    items = []
-    for row in top:
-        name = await resolve_name(row["_id"])
-        items.append((name, int(row.get("monthly_messages", 0))))
+    names = await resolve_names([row["_id"] for row in top])
+    items = [(names[row["_id"]], int(row.get("monthly_messages", 0))) for row in top]
 
     text = format_leaderboard("Leaderboard (Monthly)", items)
     kb = InlineKeyboardMarkup([[InlineKeyboardButton("Today", callback_data="today")]])
@@ -267,10 +460,8 @@ async def cb_today(_, query: CallbackQuery):
         return await query.answer("No data for today.", show_alert=True)
 
     pairs = sorted(today_counts[chat_id].items(), key=lambda x: x[1], reverse=True)[:10]
-    items = []
-    for uid, cnt in pairs:
-        name = await resolve_name(uid)
-        items.append((name, cnt))
+    names = await resolve_names([uid for uid, cnt in pairs])
+    items = [(names[uid], cnt) for uid, cnt in pairs]
 
     text = format_leaderboard("Leaderboard Today", items)
     kb = InlineKeyboardMarkup([[InlineKeyboardButton("Overall", callback_data="overall")]])
@@ -287,10 +478,8 @@ async def cb_overall(_, query: CallbackQuery):
     if not top:
         return await query.answer("No ranking data.", show_alert=True)
 
-    items = []
-    for row in top:
-        name = await resolve_name(row["_id"])
-        items.append((name, int(row.get("total_messages", 0))))
+    names = await resolve_names([row["_id"] for row in top])
+    items = [(names[row["_id"]], int(row.get("total_messages", 0))) for row in top]
 
     text = format_leaderboard("Leaderboard (Global)", items)
     kb = InlineKeyboardMarkup([[InlineKeyboardButton("Today", callback_data="today")]])
@@ -324,26 +513,20 @@ async def build_post_texts() -> Tuple[str, str, str]:
     """Return (daily_text_unused, weekly_text, monthly_text) pre-built strings."""
     # GLOBAL (used for global postings)
     top_global = await db_get_top("total_messages", 10)
-    items_global = []
-    for row in top_global:
-        name = await resolve_name(row["_id"])
-        items_global.append((name, int(row.get("total_messages", 0))))
+    names = await resolve_names([row["_id"] for row in top_global])
+    items_global = [(names[row["_id"]], int(row.get("total_messages", 0))) for row in top_global]
     text_global = format_leaderboard("Leaderboard (Global)", items_global)
 
     # WEEKLY
     top_weekly = await db_get_top("weekly_messages", 10)
-    items_weekly = []
-    for row in top_weekly:
-        name = await resolve_name(row["_id"])
-        items_weekly.append((name, int(row.get("weekly_messages", 0))))
+    names = await resolve_names([row["_id"] for row in top_weekly])
+    items_weekly = [(names[row["_id"]], int(row.get("weekly_messages", 0))) for row in top_weekly]
     text_weekly = format_leaderboard("Leaderboard (Weekly)", items_weekly)
 
     # MONTHLY
     top_monthly = await db_get_top("monthly_messages", 10)
-    items_monthly = []
-    for row in top_monthly:
-        name = await resolve_name(row["_id"])
-        items_monthly.append((name, int(row.get("monthly_messages", 0))))
+    names = await resolve_names([row["_id"] for row in top_monthly])
+    items_monthly = [(names[row["_id"]], int(row.get("monthly_messages", 0))) for row in top_monthly]
     text_monthly = format_leaderboard("Leaderboard (Monthly)", items_monthly)
 
     return text_global, text_weekly, text_monthly
@@ -375,10 +558,8 @@ async def post_daily_leaderboards():
         reset_today_if_needed()
         if chat_id in today_counts and today_counts[chat_id]:
             pairs = sorted(today_counts[chat_id].items(), key=lambda x: x[1], reverse=True)[:10]
-            items = []
-            for uid, cnt in pairs:
-                name = await resolve_name(uid)
-                items.append((name, cnt))
+            names = await resolve_names([uid for uid, cnt in pairs])
+            items = [(names[uid], cnt) for uid, cnt in pairs]
             text_chat = format_leaderboard("Leaderboard Today", items)
             kb = InlineKeyboardMarkup([[InlineKeyboardButton("Overall", callback_data="overall")]])
             try:
@@ -19,6 +19,7 @@ from VIPMUSIC.misc import db
 from VIPMUSIC.utils.database import get_assistant, get_authuser_names, get_cmode
 from VIPMUSIC.utils.decorators import ActualAdminCB, AdminActual, language
 from VIPMUSIC.utils.formatters import alpha_to_int, get_readable_time
+from VIPMUSIC.utils.stream.queueitem import ChatQueue
 from VIPMUSIC.mongo.afkdb import HEHE
 from config import BANNED_USERS, adminlist, lyrical
 BOT_TOKEN = getenv("BOT_TOKEN", "")
@@ -66,7 +67,7 @@ async def restartbot(client, message: Message, _):
     mystic = await message.reply_text(_["reload_4"].format(app.mention))
     await asyncio.sleep(1)
     try:
-        db[message.chat.id] = []
+        db[message.chat.id] = ChatQueue()
         await VIP.stop_stream_force(message.chat.id)
     except:
         pass
@@ -93,7 +94,7 @@ async def restartbot(client, message: Message, _):
         except:
             pass
         try:
-            db[chat_id] = []
+            db[chat_id] = ChatQueue()
             await VIP.stop_stream_force(chat_id)
         except:
             pass
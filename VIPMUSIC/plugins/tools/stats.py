@@ -4,7 +4,7 @@ from sys import version as pyver
 import psutil
 from pyrogram import __version__ as pyrover
 from pyrogram import filters
-from pyrogram.errors import MessageIdInvalid
+from pyrogram.errors import MediaCaptionTooLong, MessageIdInvalid
 from pyrogram.types import InputMediaPhoto, Message
 from pytgcalls.__version__ import __version__ as pytgver
 
@@ -12,14 +12,34 @@ import config
 from VIPMUSIC import app
 from VIPMUSIC.core.userbot import assistants
 from VIPMUSIC.misc import SUDOERS, mongodb
+from VIPMUSIC.platforms.Youtube import cookie_pool
 from VIPMUSIC.plugins import ALL_MODULES
+from VIPMUSIC.utils.cache import cache_stats
 from VIPMUSIC.utils.database import get_served_chats, get_served_users, get_sudoers
 from VIPMUSIC.utils.decorators.language import language, languageCB
+from VIPMUSIC.utils.httpclient import http_stats
 from VIPMUSIC.utils.inline.stats import back_stats_buttons, stats_buttons
+from VIPMUSIC.utils.proxypool import proxy_stats
+from VIPMUSIC.utils.timers import pending_timers
 from config import BANNED_USERS
 
 print("[stats] stats")
 
+# Telegram's length limits for a photo caption and a text message.
+CAPTION_LIMIT = 1024
+TEXT_LIMIT = 4096
+
+
+def _fit(_, lines: list, limit: int) -> str:
+    """The gstats_6 text with as many of ``lines`` as fit in ``limit`` characters."""
+    shown = list(lines)
+    text = _["gstats_6"].format(app.mention, "\n".join(shown))
+    while len(text) > limit and shown:
+        shown.pop()
+        more = f"… +{len(lines) - len(shown)}"
+        text = _["gstats_6"].format(app.mention, "\n".join(shown + [more]))
+    return text
+
 @app.on_message(filters.command(["stats", "gstats"]) & ~BANNED_USERS)
 @language
 async def stats_global(client, message: Message, _):
@@ -134,3 +154,60 @@ async def bot_stats(client, CallbackQuery, _):
         await CallbackQuery.message.reply_photo(
             photo=config.STATS_IMG_URL, caption=text, reply_markup=upl
         )
+
+
+@app.on_callback_query(filters.regex("cache_stats_sudo"))
+@languageCB
+async def cache_stats_cb(client, CallbackQuery, _):
+    if CallbackQuery.from_user.id not in SUDOERS:
+        return await CallbackQuery.answer(_["gstats_4"], show_alert=True)
+    upl = back_stats_buttons(_)
+    try:
+        await CallbackQuery.answer()
+    except:
+        pass
+    lines = []
+    for name, stats in cache_stats().items():
+        lines.append(
+            f"<b>{name} :</b> <code>{stats['size']}/{stats['maxsize']}</code> "
+            f"ʜɪᴛ <code>{stats['hit_rate']}%</code> "
+            f"(<code>{stats['hits']}</code>/<code>{stats['misses']}</code>)"
+        )
+    for host, stats in http_stats().items():
+        lines.append(
+            f"<b>{host} :</b> ʀᴇᴜsᴇ <code>{stats['reuse_rate']}%</code> "
+            f"(<code>{stats['reused']}</code>/<code>{stats['new']}</code>) "
+            f"ʀᴇᴛʀɪᴇs <code>{stats['retries']}</code> "
+            f"ᴇʀʀᴏʀs <code>{stats['errors']}</code>"
+        )
+    for name, stats in cookie_pool.stats().items():
+        lines.append(
+            f"<b>{name} :</b> sᴄᴏʀᴇ <code>{stats['score']}</code> "
+            f"(<code>{stats['ok']}</code>/<code>{stats['failed']}</code>/<code>{stats['limited']}</code>)"
+            + (f" ǫᴜᴀʀᴀɴᴛɪɴᴇᴅ <code>{stats['quarantined']}s</code>" if stats["quarantined"] else "")
+        )
+    for pool, proxies in proxy_stats().items():
+        for proxy, stats in proxies.items():
+            lines.append(
+                f"<b>{pool} {proxy} :</b> <code>{stats['latency']}ᴍs</code> "
+                f"ᴇʀʀ <code>{stats['error_rate']}%</code> "
+                f"<code>{stats['throughput']}ᴋʙ/s</code>"
+                + (f" ʙᴇɴᴄʜᴇᴅ <code>{stats['benched']}s</code>" if stats["benched"] else "")
+            )
+    lines.append(f"<b>ᴘᴇɴᴅɪɴɢ ᴛɪᴍᴇʀs :</b> <code>{pending_timers()}</code>")
+    text = _["gstats_6"].format(app.mention, "\n".join(lines))
+    if len(text) <= CAPTION_LIMIT:
+        try:
+            return await CallbackQuery.edit_message_caption(
+                caption=text, reply_markup=upl
+            )
+        except MessageIdInvalid:
+            return await CallbackQuery.message.reply_photo(
+                photo=config.STATS_IMG_URL, caption=text, reply_markup=upl
+            )
+        except MediaCaptionTooLong:
+            pass
+    # Every cache, host, cookie and proxy gets a line, too many for a caption.
+    await CallbackQuery.message.reply_text(
+        _fit(_, lines, TEXT_LIMIT), reply_markup=upl
+    )
@@ -0,0 +1,223 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from pyrogram.errors import FloodWait
+
+from VIPMUSIC.core.mongo import mongodb
+from VIPMUSIC.logging import LOGGER
+from VIPMUSIC.utils.cache import TTLCache
+from config import (
+    BROADCAST_CHAT_INTERVAL,
+    BROADCAST_MAX_WAIT,
+    BROADCAST_RATE,
+    BROADCAST_WORKERS,
+)
+
+logger = LOGGER(__name__)
+broadcastdb = mongodb.broadcasts
+
+# Seconds between progress reports of a running broadcast.
+PROGRESS_INTERVAL = 10
+# The cursor is checkpointed every time it moves this many chats forward.
+CHECKPOINT_EVERY = 50
+# FloodWaits sat out for one chat before it is counted as failed.
+MAX_ATTEMPTS = 3
+
+
+class TokenBucket:
+    """
+    Hands out ``rate`` tokens per second with bursts of up to ``rate``.
+    A FloodWait holds every taker for its duration and halves the rate,
+    which then creeps back up by 5% of the ceiling per send that goes through.
+    """
+
+    def __init__(self, rate: float):
+        self.ceiling = rate
+        self.rate = rate
+        self.tokens = rate
+        self.stamp = time.monotonic()
+        self.until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def take(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.until:
+                    await asyncio.sleep(self.until - now)
+                    continue
+                self.tokens = min(
+                    self.ceiling, self.tokens + (now - self.stamp) * self.rate
+                )
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def hold(self, seconds: float):
+        self.until = max(self.until, time.monotonic() + seconds)
+        self.tokens = 0
+        self.rate = max(self.rate / 2, 1.0)
+
+    def recover(self):
+        self.rate = min(self.rate + self.ceiling * 0.05, self.ceiling)
+
+
+# Shared by every broadcast so they never add up past Telegram's bot limit.
+bucket = TokenBucket(BROADCAST_RATE)
+# chat id -> it got a broadcast message within the last BROADCAST_CHAT_INTERVAL seconds
+_recent = TTLCache("broadcast_chats", 100000, BROADCAST_CHAT_INTERVAL)
+
+
+async def _chat_slot(chat_id: int):
+    while chat_id in _recent:
+        await asyncio.sleep(BROADCAST_CHAT_INTERVAL)
+    _recent.set(chat_id, True)
+
+
+def _fresh() -> Dict[str, Any]:
+    return {"cursor": None, "sent": 0, "failed": 0, "total": 0}
+
+
+async def enqueue(job: str, payload: Optional[dict] = None):
+    """Record ``job`` as unfinished before it starts, so a restart still runs it."""
+    await broadcastdb.update_one(
+        {"_id": job},
+        {"$setOnInsert": {"state": _fresh(), "payload": payload, "done": False}},
+        upsert=True,
+    )
+
+
+async def unfinished(prefix: str) -> List[Dict[str, Any]]:
+    """Checkpoints of interrupted broadcasts whose job id starts with ``prefix``."""
+    return [
+        doc
+        async for doc in broadcastdb.find(
+            {"_id": {"$regex": f"^{prefix}"}, "done": False}
+        ).sort("_id", 1)
+    ]
+
+
+async def _save(job: str, state: Dict[str, Any], payload: Optional[dict], done: bool):
+    try:
+        await broadcastdb.update_one(
+            {"_id": job},
+            {"$set": {"state": state, "payload": payload, "done": done}},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.warning(f"Could not checkpoint broadcast {job}: {e}")
+
+
+async def run_broadcast(
+    job: str,
+    targets: Iterable[int],
+    send: Callable[[int], Awaitable[Optional[str]]],
+    payload: Optional[dict] = None,
+    progress: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Call ``send(chat_id)`` for every target with BROADCAST_WORKERS senders,
+    paced by the shared token bucket and one message per chat every
+    BROADCAST_CHAT_INTERVAL seconds. ``send`` may return the name of an
+    extra counter to bump, like "pinned"; any exception counts as failed.
+
+    Targets are walked in id order and the highest id below which every
+    chat is done is checkpointed in Mongo with ``payload`` every
+    CHECKPOINT_EVERY chats and when the run ends or is cancelled, so calling
+    this again with an unfinished ``job`` carries on from there. Delivery is
+    at least once: after a crash, up to CHECKPOINT_EVERY + BROADCAST_WORKERS
+    chats past the saved cursor may get the message again. ``progress`` is
+    awaited every PROGRESS_INTERVAL seconds with the running counts.
+    """
+    doc = await broadcastdb.find_one({"_id": job})
+    if doc and not doc.get("done"):
+        state = doc["state"]
+        payload = doc.get("payload", payload)
+        logger.info(f"Resuming broadcast {job} after {state['cursor']}")
+    else:
+        state = _fresh()
+    targets = sorted(set(targets))
+    if state["cursor"] is not None:
+        targets = [chat_id for chat_id in targets if chat_id > state["cursor"]]
+    state["total"] = state["sent"] + state["failed"] + len(targets)
+    await _save(job, state, payload, False)
+
+    started = time.monotonic()
+    base = state["sent"] + state["failed"]
+    position = iter(range(len(targets)))
+    finished = set()
+    low = 0
+    saved = 0
+    saving = asyncio.Lock()
+
+    async def checkpoint(done: bool = False):
+        nonlocal saved
+        # Serialized so an older cursor can never overwrite a newer one.
+        async with saving:
+            saved = low
+            await _save(job, dict(state), payload, done)
+
+    def complete(index: int):
+        nonlocal low
+        finished.add(index)
+        while low in finished:
+            finished.discard(low)
+            state["cursor"] = targets[low]
+            low += 1
+
+    async def deliver(chat_id: int) -> bool:
+        for _ in range(MAX_ATTEMPTS):
+            await bucket.take()
+            try:
+                extra = await send(chat_id)
+            except FloodWait as fw:
+                wait = int(fw.value)
+                if wait > BROADCAST_MAX_WAIT:
+                    return False
+                bucket.hold(wait)
+                continue
+            except Exception:
+                return False
+            bucket.recover()
+            if extra:
+                state[extra] = state.get(extra, 0) + 1
+            return True
+        return False
+
+    async def sender():
+        for index in position:
+            chat_id = targets[index]
+            await _chat_slot(chat_id)
+            if await deliver(chat_id):
+                state["sent"] += 1
+            else:
+                state["failed"] += 1
+            complete(index)
+            if low - saved >= CHECKPOINT_EVERY:
+                await checkpoint()
+
+    async def report():
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            if progress is None:
+                continue
+            done = state["sent"] + state["failed"]
+            speed = (done - base) / (time.monotonic() - started)
+            state["eta"] = (state["total"] - done) / speed if speed else None
+            try:
+                await progress(state)
+            except Exception:
+                pass
+
+    reporter = asyncio.ensure_future(report())
+    try:
+        await asyncio.gather(*(sender() for _ in range(BROADCAST_WORKERS)))
+    finally:
+        # Also reached on cancellation, so a stopped bot keeps its place.
+        reporter.cancel()
+        state.pop("eta", None)
+        await checkpoint(low == len(targets))
+    return state
@@ -0,0 +1,168 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from VIPMUSIC.logging import LOGGER
+from config import COOKIE_REFRESH_INTERVAL
+
+logger = LOGGER(__name__)
+
+# Outcomes remembered per cookie when scoring it.
+WINDOW = 20
+# yt-dlp errors that say something about the cookie rather than the video.
+# Plain 403s are left out: they come from the IP or proxy as often as not.
+AUTH_ERRORS = (
+    "sign in to confirm",
+    "not a bot",
+    "cookies are no longer valid",
+    "use --cookies",
+)
+RATE_ERRORS = ("429", "too many requests", "rate limit")
+
+
+class CookiePool:
+    """
+    The cookie files yt-dlp can use. The directory is only listed again when
+    its mtime changes. Every cookie is scored by its last WINDOW outcomes;
+    ``fail_limit`` failures in a row or any 429 quarantine it for
+    ``quarantine`` seconds, doubling while it keeps failing.
+    """
+
+    def __init__(self, directory: str, fail_limit: int, quarantine: int):
+        self.directory = directory
+        self.fail_limit = fail_limit
+        self.quarantine = quarantine
+        # path -> {"recent", "ok", "failed", "limited", "streak", "strikes", "until"}
+        self.cookies: Dict[str, Dict[str, Any]] = {}
+        self.refreshers: List[Callable[[], Awaitable[Optional[str]]]] = []
+        self._mtime = None
+        self._refresh: Optional[asyncio.Task] = None
+        self._refreshed = 0.0
+
+    def scan(self):
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            self.cookies.clear()
+            self._mtime = None
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        found = {
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".txt")
+        }
+        for path in list(self.cookies):
+            if path not in found:
+                del self.cookies[path]
+        for path in found:
+            self.cookies.setdefault(
+                path,
+                {
+                    "recent": deque(maxlen=WINDOW),
+                    "ok": 0,
+                    "failed": 0,
+                    "limited": 0,
+                    "streak": 0,
+                    "strikes": 0,
+                    "until": 0.0,
+                },
+            )
+
+    def score(self, path: str) -> float:
+        recent = self.cookies[path]["recent"]
+        good = recent.count("ok")
+        bad = recent.count("failed") + 3 * recent.count("limited")
+        # Unused cookies start at 0.5 so they get tried.
+        return (good + 1) / (good + bad + 2)
+
+    def healthy(self) -> List[str]:
+        self.scan()
+        now = time.monotonic()
+        return [path for path, c in self.cookies.items() if c["until"] <= now]
+
+    def pick(self) -> Optional[str]:
+        """A cookie file weighted by score, quarantined ones only as a last resort."""
+        candidates = self.healthy()
+        if not candidates:
+            if not self.cookies:
+                return None
+            # Everything is quarantined, use the one closest to parole.
+            return min(self.cookies, key=lambda p: self.cookies[p]["until"])
+        weights = [self.score(path) ** 2 for path in candidates]
+        return random.choices(candidates, weights)[0]
+
+    def report(self, path: Optional[str], error: Optional[str] = None):
+        """
+        Record how a yt-dlp run using ``path`` went. ``error`` is the yt-dlp
+        error text, or None on success. Errors unrelated to the cookie, like
+        an unavailable video, are not held against it.
+        """
+        cookie = self.cookies.get(path)
+        if cookie is None:
+            return
+        if error is None:
+            cookie["recent"].append("ok")
+            cookie["ok"] += 1
+            cookie["streak"] = 0
+            cookie["strikes"] = 0
+            return
+        text = error.lower()
+        if any(word in text for word in RATE_ERRORS):
+            cookie["recent"].append("limited")
+            cookie["limited"] += 1
+            self._quarantine(path, cookie)
+        elif any(word in text for word in AUTH_ERRORS):
+            cookie["recent"].append("failed")
+            cookie["failed"] += 1
+            cookie["streak"] += 1
+            if cookie["streak"] >= self.fail_limit:
+                self._quarantine(path, cookie)
+
+    def _quarantine(self, path: str, cookie: Dict[str, Any]):
+        cookie["strikes"] += 1
+        cookie["streak"] = 0
+        delay = self.quarantine * 2 ** min(cookie["strikes"] - 1, 5)
+        cookie["until"] = time.monotonic() + delay
+        logger.warning(f"Cookie {os.path.basename(path)} quarantined for {delay}s")
+        if not self.healthy():
+            self.schedule_refresh()
+
+    def schedule_refresh(self):
+        """Fetch fresh cookies in the background; one refresh runs at a time."""
+        if not self.refreshers or (self._refresh and not self._refresh.done()):
+            return
+        if time.monotonic() - self._refreshed < COOKIE_REFRESH_INTERVAL:
+            return
+        self._refreshed = time.monotonic()
+        self._refresh = asyncio.create_task(self._run_refresh())
+
+    async def _run_refresh(self):
+        for refresher in self.refreshers:
+            try:
+                if await refresher():
+                    logger.info(f"Cookies refreshed by {refresher.__name__}")
+                    break
+            except Exception as e:
+                logger.error(f"Cookie refresh with {refresher.__name__} failed: {e}")
+        self._mtime = None
+        self.scan()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        self.scan()
+        now = time.monotonic()
+        return {
+            os.path.basename(path): {
+                "score": round(self.score(path), 2),
+                "ok": c["ok"],
+                "failed": c["failed"],
+                "limited": c["limited"],
+                "quarantined": max(int(c["until"] - now), 0),
+            }
+            for path, c in self.cookies.items()
+        }
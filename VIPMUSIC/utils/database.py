@@ -1,11 +1,21 @@
-import random
-from typing import Dict, List, Union
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional, TypedDict, Union
 
 from VIPMUSIC import userbot
 from VIPMUSIC.core.mongo import mongodb
+from VIPMUSIC.utils.cache import TTLCache
 
 from motor.motor_asyncio import AsyncIOMotorClient
-from config import MONGO_DB_URI, DATABASE_NAME
+from pymongo import UpdateOne
+from config import (
+    ASSISTANT_MAX_CALLS,
+    CHAT_SETTINGS_CACHE_SIZE,
+    CHAT_SETTINGS_CACHE_TTL,
+    DATABASE_NAME,
+    MONGO_DB_URI,
+)
 
 # Initialize MongoDB client
 _mongo_client = AsyncIOMotorClient(MONGO_DB_URI)
@@ -24,6 +34,7 @@ countdb = mongodb.upcount
 gbansdb = mongodb.gban
 langdb = mongodb.language
 onoffdb = mongodb.onoffper
+migrationsdb = mongodb.migrations
 playmodedb = mongodb.playmode
 playtypedb = mongodb.playtypedb
 skipdb = mongodb.skipmode
@@ -33,31 +44,164 @@ privatedb = mongodb.privatechats
 suggdb = mongodb.suggestion
 cleandb = mongodb.cleanmode
 queriesdb = mongodb.queries
+settingsdb = mongodb.chat_settings
 userdb = mongodb.userstats
 videodb = mongodb.vipvideocalls
 
 # Shifting to memory [mongo sucks often]
-active = []
-activevideo = []
+# Active calls: dicts used as insertion-ordered sets (chat_id -> assistant)
+active = {}
+activevideo = {}
+# assistant -> chat_ids it is streaming in, and the video subset of those
+assistant_calls = {}
+assistant_video_calls = {}
+# callbacks(event, chat_id, mode) for "join"/"leave" of "call"/"video"
+active_listeners = []
 assistantdict = {}
 autoend = {}
-count = {}
-channelconnect = {}
-langm = {}
 loop = {}
 maintenance = []
-nonadmin = {}
+onoff = {}
 pause = {}
-playmode = {}
-playtype = {}
-skipmode = {}
+# chat_id -> [monotonic start of the current run or None while paused,
+#             seconds played before that run]
+playclock = {}
 privatechats = {}
 cleanmode = []
-suggestion = {}
 mute = {}
 audio = {}
 video = {}
 
+
+# Per-chat settings live in one chat_settings document per chat, loaded whole
+# on first touch and written through by setters
+
+
+class ChatSettings(TypedDict):
+    lang: str
+    playmode: str
+    playtype: str
+    cmode: Optional[int]
+    skipmode: bool
+    upvotes: int
+    nonadmin: bool
+    suggestion: bool
+
+
+CHAT_SETTINGS_DEFAULTS = ChatSettings(
+    lang="en",
+    playmode="Direct",
+    playtype="Everyone",
+    cmode=None,
+    skipmode=True,
+    upvotes=5,
+    nonadmin=False,
+    suggestion=True,
+)
+
+chatsettings = TTLCache(
+    "chat_settings", CHAT_SETTINGS_CACHE_SIZE, CHAT_SETTINGS_CACHE_TTL
+)
+servedchats = TTLCache(
+    "served_chats", CHAT_SETTINGS_CACHE_SIZE, CHAT_SETTINGS_CACHE_TTL
+)
+servedusers = TTLCache(
+    "served_users", CHAT_SETTINGS_CACHE_SIZE, CHAT_SETTINGS_CACHE_TTL
+)
+_settings_loading = {}
+
+
+async def read_chat_settings(chat_id: int, *fields: str) -> dict:
+    """Uncached read of ``fields`` (all settings if none given) with defaults filled in."""
+    fields = fields or tuple(CHAT_SETTINGS_DEFAULTS)
+    projection = {"_id": 0}
+    projection.update({field: 1 for field in fields})
+    doc = await settingsdb.find_one({"chat_id": chat_id}, projection) or {}
+    return {field: doc.get(field, CHAT_SETTINGS_DEFAULTS[field]) for field in fields}
+
+
+async def _load_chat_settings(chat_id: int) -> ChatSettings:
+    return ChatSettings(**await read_chat_settings(chat_id))
+
+
+def _settings_loaded(chat_id: int, task: asyncio.Future):
+    _settings_loading.pop(chat_id, None)
+    if not task.cancelled() and task.exception() is None:
+        chatsettings.set(chat_id, task.result())
+
+
+async def get_chat_settings(chat_id: int) -> ChatSettings:
+    settings = chatsettings.get(chat_id)
+    if settings is not None:
+        return settings
+    # Concurrent misses for the same chat share one load.
+    task = _settings_loading.get(chat_id)
+    if task is None:
+        task = asyncio.ensure_future(_load_chat_settings(chat_id))
+        task.add_done_callback(lambda t: _settings_loaded(chat_id, t))
+        _settings_loading[chat_id] = task
+    return await asyncio.shield(task)
+
+
+async def _update_chat_settings(chat_id: int, **fields):
+    settings = await get_chat_settings(chat_id)
+    settings.update(fields)
+    return await settingsdb.update_one(
+        {"chat_id": chat_id}, {"$set": fields}, upsert=True
+    )
+
+
+# (legacy collection, field, key in legacy doc or None when presence is the value)
+_LEGACY_SETTINGS = (
+    (langdb, "lang", "lang"),
+    (playmodedb, "playmode", "mode"),
+    (playtypedb, "playtype", "mode"),
+    (channeldb, "cmode", "mode"),
+    (countdb, "upvotes", "mode"),
+    (skipdb, "skipmode", None),
+    (authdb, "nonadmin", None),
+    (suggdb, "suggestion", None),
+)
+
+
+async def migrate_chat_settings():
+    """
+    Fold the old one-collection-per-flag settings into chat_settings. Runs once;
+    values already present in chat_settings are never overwritten.
+    """
+    if await migrationsdb.find_one({"name": "chat_settings"}):
+        return 0
+    await settingsdb.create_index("chat_id", unique=True)
+    migrated = 0
+    for collection, field, key in _LEGACY_SETTINGS:
+        ops = []
+        async for doc in collection.find({"chat_id": {"$exists": True}}):
+            if key is None:
+                # skipmode/suggestion are stored as "off" markers, nonadmin as "on"
+                value = field == "nonadmin"
+            elif key in doc:
+                value = doc[key]
+            else:
+                continue
+            ops.append(
+                UpdateOne(
+                    {"chat_id": doc["chat_id"]},
+                    [{"$set": {field: {"$ifNull": [f"${field}", value]}}}],
+                    upsert=True,
+                )
+            )
+            if len(ops) >= 1000:
+                await settingsdb.bulk_write(ops, ordered=False)
+                migrated += len(ops)
+                ops = []
+        if ops:
+            await settingsdb.bulk_write(ops, ordered=False)
+            migrated += len(ops)
+    await migrationsdb.insert_one({"name": "chat_settings", "documents": migrated})
+    chatsettings.clear()
+    return migrated
+
+
 # Total Queries on bot
 
 
@@ -177,16 +321,7 @@ async def get_assistant_number(chat_id: int) -> str:
 
 
 async def get_client(assistant: int):
-    if int(assistant) == 1:
-        return userbot.one
-    elif int(assistant) == 2:
-        return userbot.two
-    elif int(assistant) == 3:
-        return userbot.three
-    elif int(assistant) == 4:
-        return userbot.four
-    elif int(assistant) == 5:
-        return userbot.five
+    return userbot.get(assistant)
 
 
 async def set_assistant_new(chat_id, number):
@@ -198,10 +333,63 @@ async def set_assistant_new(chat_id, number):
     )
 
 
-async def set_assistant(chat_id):
+# A video call costs roughly this many audio calls of ffmpeg/PyTgCalls work.
+VIDEO_CALL_WEIGHT = 3
+# Assistants with this many errors inside the window are skipped for new chats.
+ASSISTANT_ERROR_LIMIT = 5
+ASSISTANT_ERROR_WINDOW = 600
+
+# assistant -> monotonic timestamps of its recent call errors
+assistant_errors = {}
+# assistant -> monotonic time its FloodWait ends
+assistant_flood = {}
+
+
+def record_assistant_error(assistant: int, flood_wait: int = 0):
+    if not assistant:
+        return
+    now = time.monotonic()
+    errors = assistant_errors.setdefault(assistant, deque())
+    errors.append(now)
+    if flood_wait:
+        assistant_flood[assistant] = max(
+            assistant_flood.get(assistant, 0), now + flood_wait
+        )
+
+
+def assistant_load(assistant: int) -> dict:
+    now = time.monotonic()
+    errors = assistant_errors.get(assistant, ())
+    while errors and errors[0] < now - ASSISTANT_ERROR_WINDOW:
+        errors.popleft()
+    calls = len(assistant_calls.get(assistant, ()))
+    video = len(assistant_video_calls.get(assistant, ()))
+    return {
+        "calls": calls,
+        "video": video,
+        "errors": len(errors),
+        "flooded": assistant_flood.get(assistant, 0) > now,
+        "score": calls + (VIDEO_CALL_WEIGHT - 1) * video + len(errors),
+    }
+
+
+def _assistant_usable(load: dict) -> bool:
+    if load["flooded"] or load["errors"] >= ASSISTANT_ERROR_LIMIT:
+        return False
+    return not ASSISTANT_MAX_CALLS or load["calls"] < ASSISTANT_MAX_CALLS
+
+
+def pick_assistant() -> int:
+    """Least loaded healthy assistant below the call cap, else least loaded overall."""
     from VIPMUSIC.core.userbot import assistants
 
-    ran_assistant = random.choice(assistants)
+    loads = {num: assistant_load(num) for num in assistants}
+    usable = [num for num in assistants if _assistant_usable(loads[num])]
+    return min(usable or assistants, key=lambda num: (loads[num]["score"], num))
+
+
+async def set_assistant(chat_id):
+    ran_assistant = pick_assistant()
     assistantdict[chat_id] = ran_assistant
     await assdb.update_one(
         {"chat_id": chat_id},
@@ -212,6 +400,16 @@ async def set_assistant(chat_id):
     return userbot
 
 
+def _keep_assistant(chat_id: int, assistant: int) -> bool:
+    """
+    Chats stick to their assistant; an idle chat is only moved off one that is
+    flooded, erroring or over the call cap. Never moves a chat mid-stream.
+    """
+    if chat_id in active:
+        return True
+    return _assistant_usable(assistant_load(assistant))
+
+
 async def get_assistant(chat_id: int) -> str:
     from VIPMUSIC.core.userbot import assistants
 
@@ -223,7 +421,7 @@ async def get_assistant(chat_id: int) -> str:
             return userbot
         else:
             got_assis = dbassistant["assistant"]
-            if got_assis in assistants:
+            if got_assis in assistants and _keep_assistant(chat_id, got_assis):
                 assistantdict[chat_id] = got_assis
                 userbot = await get_client(got_assis)
                 return userbot
@@ -231,7 +429,7 @@ async def get_assistant(chat_id: int) -> str:
                 userbot = await set_assistant(chat_id)
                 return userbot
     else:
-        if assistant in assistants:
+        if assistant in assistants and _keep_assistant(chat_id, assistant):
             userbot = await get_client(assistant)
             return userbot
         else:
@@ -240,9 +438,7 @@ async def get_assistant(chat_id: int) -> str:
 
 
 async def set_calls_assistant(chat_id):
-    from VIPMUSIC.core.userbot import assistants
-
-    ran_assistant = random.choice(assistants)
+    ran_assistant = pick_assistant()
     assistantdict[chat_id] = ran_assistant
     await assdb.update_one(
         {"chat_id": chat_id},
@@ -272,60 +468,27 @@ async def group_assistant(self, chat_id: int) -> int:
             assis = assistant
         else:
             assis = await set_calls_assistant(chat_id)
-    if int(assis) == 1:
-        return self.one
-    elif int(assis) == 2:
-        return self.two
-    elif int(assis) == 3:
-        return self.three
-    elif int(assis) == 4:
-        return self.four
-    elif int(assis) == 5:
-        return self.five
+    return self.get(assis)
 
 
 async def is_skipmode(chat_id: int) -> bool:
-    mode = skipmode.get(chat_id)
-    if not mode:
-        user = await skipdb.find_one({"chat_id": chat_id})
-        if not user:
-            skipmode[chat_id] = True
-            return True
-        skipmode[chat_id] = False
-        return False
-    return mode
+    return (await get_chat_settings(chat_id))["skipmode"]
 
 
 async def skip_on(chat_id: int):
-    skipmode[chat_id] = True
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if user:
-        return await skipdb.delete_one({"chat_id": chat_id})
+    return await _update_chat_settings(chat_id, skipmode=True)
 
 
 async def skip_off(chat_id: int):
-    skipmode[chat_id] = False
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if not user:
-        return await skipdb.insert_one({"chat_id": chat_id})
+    return await _update_chat_settings(chat_id, skipmode=False)
 
 
 async def get_upvote_count(chat_id: int) -> int:
-    mode = count.get(chat_id)
-    if not mode:
-        mode = await countdb.find_one({"chat_id": chat_id})
-        if not mode:
-            return 5
-        count[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["upvotes"]
 
 
 async def set_upvotes(chat_id: int, mode: int):
-    count[chat_id] = mode
-    await countdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _update_chat_settings(chat_id, upvotes=mode)
 
 
 async def is_autoend() -> bool:
@@ -358,71 +521,31 @@ async def set_loop(chat_id: int, mode: int):
 
 
 async def get_cmode(chat_id: int) -> int:
-    mode = channelconnect.get(chat_id)
-    if not mode:
-        mode = await channeldb.find_one({"chat_id": chat_id})
-        if not mode:
-            return None
-        channelconnect[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["cmode"]
 
 
 async def set_cmode(chat_id: int, mode: int):
-    channelconnect[chat_id] = mode
-    await channeldb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _update_chat_settings(chat_id, cmode=mode)
 
 
 async def get_playtype(chat_id: int) -> str:
-    mode = playtype.get(chat_id)
-    if not mode:
-        mode = await playtypedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playtype[chat_id] = "Everyone"
-            return "Everyone"
-        playtype[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["playtype"]
 
 
 async def set_playtype(chat_id: int, mode: str):
-    playtype[chat_id] = mode
-    await playtypedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _update_chat_settings(chat_id, playtype=mode)
 
 
 async def get_playmode(chat_id: int) -> str:
-    mode = playmode.get(chat_id)
-    if not mode:
-        mode = await playmodedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playmode[chat_id] = "Direct"
-            return "Direct"
-        playmode[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return (await get_chat_settings(chat_id))["playmode"]
 
 
 async def set_playmode(chat_id: int, mode: str):
-    playmode[chat_id] = mode
-    await playmodedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _update_chat_settings(chat_id, playmode=mode)
 
 
 async def get_lang(chat_id: int) -> str:
-    mode = langm.get(chat_id)
-    if not mode:
-        lang = await langdb.find_one({"chat_id": chat_id})
-        if not lang:
-            langm[chat_id] = "en"
-            return "en"
-        langm[chat_id] = lang["lang"]
-        return lang["lang"]
-    return mode
+    return (await get_chat_settings(chat_id))["lang"]
 
 #async def get_lang(chat_id: int):
   #  from strings import get_string  # ✅ make sure we can access translation maps
@@ -441,8 +564,7 @@ async def get_lang(chat_id: int) -> str:
 
 
 async def set_lang(chat_id: int, lang: str):
-    langm[chat_id] = lang
-    await langdb.update_one({"chat_id": chat_id}, {"$set": {"lang": lang}}, upsert=True)
+    await _update_chat_settings(chat_id, lang=lang)
 
 
 async def is_music_playing(chat_id: int) -> bool:
@@ -454,10 +576,36 @@ async def is_music_playing(chat_id: int) -> bool:
 
 async def music_on(chat_id: int):
     pause[chat_id] = True
+    clock = playclock.get(chat_id)
+    if clock and clock[0] is None:
+        clock[0] = time.monotonic()
 
 
 async def music_off(chat_id: int):
     pause[chat_id] = False
+    clock = playclock.get(chat_id)
+    if clock and clock[0] is not None:
+        clock[1] += time.monotonic() - clock[0]
+        clock[0] = None
+
+
+def start_clock(chat_id: int, position: int = 0):
+    """(Re)start the position of the chat's current track at ``position`` seconds."""
+    playclock[chat_id] = [time.monotonic() if pause.get(chat_id) else None, position]
+
+
+def get_played(chat_id: int, duration: int = 0) -> int:
+    """Seconds played of the current track, capped at ``duration`` when known."""
+    clock = playclock.get(chat_id)
+    if not clock:
+        return 0
+    played = clock[1]
+    if clock[0] is not None:
+        played += time.monotonic() - clock[0]
+    played = int(played)
+    duration = int(duration or 0)
+    return min(played, duration) if duration > 0 else played
+
 
 # Muted
 async def is_muted(chat_id: int) -> bool:
@@ -475,94 +623,116 @@ async def mute_off(chat_id: int):
     mute[chat_id] = False
 
 
+def on_active_change(callback):
+    """Subscribe ``callback(event, chat_id, mode)`` to active call joins/leaves."""
+    active_listeners.append(callback)
+    return callback
+
+
+def _drop_clock(event: str, chat_id: int, mode: str):
+    if event == "leave" and mode == "call":
+        playclock.pop(chat_id, None)
+
+
+on_active_change(_drop_clock)
+
+
+def _publish(event: str, chat_id: int, mode: str):
+    for callback in active_listeners:
+        try:
+            callback(event, chat_id, mode)
+        except Exception as e:
+            print(f"[active] {callback.__name__} failed on {event} {chat_id}: {e}")
+
+
+def _index(registry: dict, by_assistant: dict, chat_id: int, mode: str) -> bool:
+    if chat_id in registry:
+        return False
+    assistant = assistantdict.get(chat_id)
+    registry[chat_id] = assistant
+    by_assistant.setdefault(assistant, set()).add(chat_id)
+    _publish("join", chat_id, mode)
+    return True
+
+
+def _unindex(registry: dict, by_assistant: dict, chat_id: int, mode: str) -> bool:
+    if chat_id not in registry:
+        return False
+    assistant = registry.pop(chat_id)
+    chats = by_assistant.get(assistant)
+    if chats is not None:
+        chats.discard(chat_id)
+        if not chats:
+            del by_assistant[assistant]
+    _publish("leave", chat_id, mode)
+    return True
+
+
 async def get_active_chats() -> list:
-    return active
+    return list(active)
 
 
 async def is_active_chat(chat_id: int) -> bool:
-    if chat_id not in active:
-        return False
-    else:
-        return True
+    return chat_id in active
 
 
 async def add_active_chat(chat_id: int):
-    if chat_id not in active:
-        active.append(chat_id)
+    _index(active, assistant_calls, chat_id, "call")
 
 
 async def remove_active_chat(chat_id: int):
-    if chat_id in active:
-        active.remove(chat_id)
+    _unindex(active, assistant_calls, chat_id, "call")
 
 
 async def get_active_video_chats() -> list:
-    return activevideo
+    return list(activevideo)
 
 
 async def is_active_video_chat(chat_id: int) -> bool:
-    if chat_id not in activevideo:
-        return False
-    else:
-        return True
+    return chat_id in activevideo
 
 
 async def add_active_video_chat(chat_id: int):
-    if chat_id not in activevideo:
-        activevideo.append(chat_id)
+    _index(activevideo, assistant_video_calls, chat_id, "video")
 
 
 async def remove_active_video_chat(chat_id: int):
-    if chat_id in activevideo:
-        activevideo.remove(chat_id)
+    _unindex(activevideo, assistant_video_calls, chat_id, "video")
 
 
 async def check_nonadmin_chat(chat_id: int) -> bool:
-    user = await authdb.find_one({"chat_id": chat_id})
-    if not user:
-        return False
-    return True
+    return await is_nonadmin_chat(chat_id)
 
 
 async def is_nonadmin_chat(chat_id: int) -> bool:
-    mode = nonadmin.get(chat_id)
-    if not mode:
-        user = await authdb.find_one({"chat_id": chat_id})
-        if not user:
-            nonadmin[chat_id] = False
-            return False
-        nonadmin[chat_id] = True
-        return True
-    return mode
+    return (await get_chat_settings(chat_id))["nonadmin"]
 
 
 async def add_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = True
-    is_admin = await check_nonadmin_chat(chat_id)
-    if is_admin:
+    if await is_nonadmin_chat(chat_id):
         return
-    return await authdb.insert_one({"chat_id": chat_id})
+    return await _update_chat_settings(chat_id, nonadmin=True)
 
 
 async def remove_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = False
-    is_admin = await check_nonadmin_chat(chat_id)
-    if not is_admin:
+    if not await is_nonadmin_chat(chat_id):
         return
-    return await authdb.delete_one({"chat_id": chat_id})
+    return await _update_chat_settings(chat_id, nonadmin=False)
 
 
 async def is_on_off(on_off: int) -> bool:
-    onoff = await onoffdb.find_one({"on_off": on_off})
-    if not onoff:
-        return False
-    return True
+    mode = onoff.get(on_off)
+    if mode is None:
+        mode = bool(await onoffdb.find_one({"on_off": on_off}))
+        onoff[on_off] = mode
+    return mode
 
 
 async def add_on(on_off: int):
     is_on = await is_on_off(on_off)
     if is_on:
         return
+    onoff[on_off] = True
     return await onoffdb.insert_one({"on_off": on_off})
 
 
@@ -570,12 +740,13 @@ async def add_off(on_off: int):
     is_off = await is_on_off(on_off)
     if not is_off:
         return
+    onoff[on_off] = False
     return await onoffdb.delete_one({"on_off": on_off})
 
 
 async def is_maintenance():
     if not maintenance:
-        get = await onoffdb.find_one({"on_off": 1})
+        get = await is_on_off(1)
         if not get:
             maintenance.clear()
             maintenance.append(2)
@@ -594,26 +765,21 @@ async def is_maintenance():
 async def maintenance_off():
     maintenance.clear()
     maintenance.append(2)
-    is_off = await is_on_off(1)
-    if not is_off:
-        return
-    return await onoffdb.delete_one({"on_off": 1})
+    return await add_off(1)
 
 
 async def maintenance_on():
     maintenance.clear()
     maintenance.append(1)
-    is_on = await is_on_off(1)
-    if is_on:
-        return
-    return await onoffdb.insert_one({"on_off": 1})
+    return await add_on(1)
 
 
 async def is_served_user(user_id: int) -> bool:
-    user = await usersdb.find_one({"user_id": user_id})
-    if not user:
-        return False
-    return True
+    served = servedusers.get(user_id)
+    if served is None:
+        served = bool(await usersdb.find_one({"user_id": user_id}))
+        servedusers.set(user_id, served)
+    return served
 
 
 async def get_served_users() -> list:
@@ -627,6 +793,7 @@ async def add_served_user(user_id: int):
     is_served = await is_served_user(user_id)
     if is_served:
         return
+    servedusers.set(user_id, True)
     return await usersdb.insert_one({"user_id": user_id})
 
 
@@ -638,19 +805,22 @@ async def get_served_chats() -> list:
 
 
 async def is_served_chat(chat_id: int) -> bool:
-    chat = await chatsdb.find_one({"chat_id": chat_id})
-    if not chat:
-        return False
-    return True
+    served = servedchats.get(chat_id)
+    if served is None:
+        served = bool(await chatsdb.find_one({"chat_id": chat_id}))
+        servedchats.set(chat_id, served)
+    return served
 
 
 async def add_served_chat(chat_id: int):
     is_served = await is_served_chat(chat_id)
     if is_served:
         return
+    servedchats.set(chat_id, True)
     return await chatsdb.insert_one({"chat_id": chat_id})
     
 async def delete_served_chat(chat_id: int):
+    servedchats.set(chat_id, False)
     await chatsdb.delete_one({"chat_id": chat_id})
 
 async def blacklisted_chats() -> list:
@@ -843,29 +1013,15 @@ async def remove_private_chat(chat_id: int):
 
 
 async def is_suggestion(chat_id: int) -> bool:
-    mode = suggestion.get(chat_id)
-    if not mode:
-        user = await suggdb.find_one({"chat_id": chat_id})
-        if not user:
-            suggestion[chat_id] = True
-            return True
-        suggestion[chat_id] = False
-        return False
-    return mode
+    return (await get_chat_settings(chat_id))["suggestion"]
 
 
 async def suggestion_on(chat_id: int):
-    suggestion[chat_id] = True
-    user = await suggdb.find_one({"chat_id": chat_id})
-    if user:
-        return await suggdb.delete_one({"chat_id": chat_id})
+    return await _update_chat_settings(chat_id, suggestion=True)
 
 
 async def suggestion_off(chat_id: int):
-    suggestion[chat_id] = False
-    user = await suggdb.find_one({"chat_id": chat_id})
-    if not user:
-        return await suggdb.insert_one({"chat_id": chat_id})
+    return await _update_chat_settings(chat_id, suggestion=False)
 
 # Clean Mode
 async def is_cleanmode_on(chat_id: int) -> bool:
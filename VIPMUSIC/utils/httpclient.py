@@ -0,0 +1,132 @@
+import asyncio
+import random
+from typing import Any, Dict, Optional
+
+import aiohttp
+from yarl import URL
+
+from VIPMUSIC.logging import LOGGER
+from config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_LIMIT,
+    HTTP_LIMIT_PER_HOST,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRIES,
+)
+
+logger = LOGGER(__name__)
+
+# Status codes worth another attempt, everything else is returned to the caller.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session: Optional[aiohttp.ClientSession] = None
+# host -> {"requests", "new", "reused", "retries", "errors"}
+host_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _host(ctx) -> Dict[str, int]:
+    stats = host_stats.get(ctx.host)
+    if stats is None:
+        stats = host_stats[ctx.host] = {
+            "requests": 0,
+            "new": 0,
+            "reused": 0,
+            "retries": 0,
+            "errors": 0,
+        }
+    return stats
+
+
+async def _on_request_start(session, ctx, params):
+    ctx.host = params.url.host
+    _host(ctx)["requests"] += 1
+
+
+async def _on_connection_create_end(session, ctx, params):
+    _host(ctx)["new"] += 1
+
+
+async def _on_connection_reuseconn(session, ctx, params):
+    _host(ctx)["reused"] += 1
+
+
+async def _on_request_exception(session, ctx, params):
+    _host(ctx)["errors"] += 1
+
+
+def _new_session() -> aiohttp.ClientSession:
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(_on_request_start)
+    trace.on_connection_create_end.append(_on_connection_create_end)
+    trace.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace.on_request_exception.append(_on_request_exception)
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_LIMIT,
+        limit_per_host=HTTP_LIMIT_PER_HOST,
+        ttl_dns_cache=300,
+        keepalive_timeout=60,
+    )
+    # No total timeout: track downloads can legitimately take minutes, a
+    # stalled socket is caught by the read timeout instead.
+    timeout = aiohttp.ClientTimeout(
+        total=None, sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT
+    )
+    return aiohttp.ClientSession(
+        connector=connector, timeout=timeout, trace_configs=[trace]
+    )
+
+
+async def start_http():
+    global _session
+    if _session is None or _session.closed:
+        _session = _new_session()
+
+
+async def close_http():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """The shared pooled session, created on first use if start_http() hasn't run."""
+    global _session
+    if _session is None or _session.closed:
+        _session = _new_session()
+    return _session
+
+
+async def request(
+    method: str, url: str, retries: int = HTTP_RETRIES, **kwargs: Any
+) -> aiohttp.ClientResponse:
+    """
+    Send a request on the shared session, retrying connection errors,
+    timeouts and 429/5xx answers with jittered exponential backoff. The caller
+    owns the returned response and should use it as ``async with resp:``.
+    """
+    attempt = 0
+    while True:
+        try:
+            resp = await get_session().request(method, url, **kwargs)
+            if resp.status not in RETRY_STATUSES or attempt >= retries:
+                return resp
+            resp.release()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= retries:
+                raise
+        attempt += 1
+        host = URL(url).host
+        if host in host_stats:
+            host_stats[host]["retries"] += 1
+        await asyncio.sleep(min(0.5 * 2**attempt, 10) * random.uniform(0.5, 1.5))
+
+
+def http_stats() -> Dict[str, Dict[str, Any]]:
+    result = {}
+    for host, stats in host_stats.items():
+        conns = stats["new"] + stats["reused"]
+        result[host] = dict(
+            stats, reuse_rate=round(stats["reused"] / conns * 100, 2) if conns else 0.0
+        )
+    return result
@@ -0,0 +1,182 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from VIPMUSIC.logging import LOGGER
+from VIPMUSIC.utils.cache import caches
+from VIPMUSIC.utils.timers import is_scheduled, schedule
+from config import MEDIA_CACHE_POLICY, MEDIA_CACHE_SIZE
+
+DOWNLOAD_DIR = "downloads"
+MANIFEST_FILE = os.path.join(DOWNLOAD_DIR, "manifest.json")
+# Seconds a changed manifest may wait before it is written out.
+SAVE_DELAY = 30
+
+logger = LOGGER(__name__)
+
+
+class MediaCache:
+    """
+    Disk cache for downloaded tracks. A JSON manifest records the size, last
+    access and hit count of every managed file; once the total size passes
+    ``budget`` bytes the least recently (``lru``) or least frequently
+    (``lfu``) used files are deleted. Files referenced by a queue are pinned
+    and never evicted.
+    """
+
+    def __init__(self, name: str, manifest: str, budget: int, policy: str = "lru"):
+        self.name = name
+        self.manifest = manifest
+        self.budget = budget
+        self.policy = policy if policy in ("lru", "lfu") else "lru"
+        # path -> {"size": bytes, "last_access": epoch, "hits": int}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # path -> number of queue entries currently using it
+        self.pinned: Dict[str, int] = {}
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._dirty = False
+        self.load()
+        caches[name] = self
+
+    def load(self):
+        try:
+            with open(self.manifest) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        for path, entry in entries.items():
+            if not os.path.isfile(path):
+                continue
+            entry["size"] = os.path.getsize(path)
+            self.entries[path] = entry
+            self.used += entry["size"]
+        self._dirty = len(self.entries) != len(entries)
+        self.evict()
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.manifest), exist_ok=True)
+        tmp = f"{self.manifest}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, self.manifest)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Could not write media manifest: {e}")
+
+    def _changed(self):
+        """Mark the manifest dirty and write it within SAVE_DELAY seconds."""
+        self._dirty = True
+        if not is_scheduled(("manifest", self.name)):
+            schedule(("manifest", self.name), SAVE_DELAY, self.save)
+
+    def lookup(self, path: str) -> bool:
+        """Return True and record a hit if ``path`` is on disk."""
+        if not os.path.isfile(path):
+            self.misses += 1
+            self._drop(path)
+            return False
+        entry = self.entries.get(path)
+        if entry is None:
+            # Downloaded before the manifest existed, adopt it.
+            return self.add(path) and self.lookup(path)
+        entry["last_access"] = time.time()
+        entry["hits"] += 1
+        self.hits += 1
+        self._changed()
+        return True
+
+    def add(self, path: str) -> bool:
+        """Start managing a freshly downloaded file and enforce the budget."""
+        if not path or not os.path.isfile(path):
+            return False
+        self._drop(path)
+        size = os.path.getsize(path)
+        self.entries[path] = {"size": size, "last_access": time.time(), "hits": 0}
+        self.used += size
+        self.evict(keep=path)
+        self._changed()
+        return True
+
+    def pin(self, path: str):
+        """
+        Add one queue reference to ``path``. Counted even before the file is
+        managed here, so a download that lands later is protected and every
+        release has a pin to match.
+        """
+        self.pinned[path] = self.pinned.get(path, 0) + 1
+
+    def release(self, path: str) -> bool:
+        """
+        Drop one queue reference to ``path``. Returns False if the file is not
+        managed here so the caller can delete it the old way.
+        """
+        refs = self.pinned.get(path, 0) - 1
+        if refs > 0:
+            self.pinned[path] = refs
+        else:
+            self.pinned.pop(path, None)
+        if path not in self.entries:
+            return False
+        self.evict()
+        self._changed()
+        return True
+
+    def evict(self, keep: Optional[str] = None):
+        if self.used <= self.budget:
+            return
+        if self.policy == "lfu":
+            key = lambda p: (self.entries[p]["hits"], self.entries[p]["last_access"])
+        else:
+            key = lambda p: self.entries[p]["last_access"]
+        for path in sorted(self.entries, key=key):
+            if self.used <= self.budget:
+                break
+            if path == keep or path in self.pinned:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not evict {path}: {e}")
+                continue
+            self._drop(path)
+            self.evictions += 1
+
+    def clear(self):
+        # Pins belong to the queues, which still hold their references.
+        self.entries.clear()
+        self.used = 0
+        self._dirty = True
+        self.save()
+
+    def _drop(self, path: str):
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self.used -= entry["size"]
+            self._dirty = True
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": f"{round(self.used / 1024**2)}ᴍʙ",
+            "maxsize": f"{round(self.budget / 1024**2)}ᴍʙ",
+            "files": len(self.entries),
+            "pinned": sum(1 for path in self.pinned if path in self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0.0,
+        }
+
+
+media_cache = MediaCache(
+    "media", MANIFEST_FILE, MEDIA_CACHE_SIZE * 1024**2, MEDIA_CACHE_POLICY
+)
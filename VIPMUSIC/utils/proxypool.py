@@ -0,0 +1,182 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from VIPMUSIC.logging import LOGGER
+from VIPMUSIC.utils.httpclient import request
+from VIPMUSIC.utils.timers import schedule
+from config import (
+    PROXY_COOLDOWN,
+    PROXY_FAIL_LIMIT,
+    PROXY_PROBE_INTERVAL,
+    PROXY_PROBE_TIMEOUT,
+    PROXY_PROBE_URL,
+)
+
+logger = LOGGER(__name__)
+
+# Weight of the newest sample in the latency and error moving averages.
+ALPHA = 0.3
+# yt-dlp errors that point at the proxy rather than the video or cookie.
+NETWORK_ERRORS = (
+    "proxy",
+    "timed out",
+    "timeout",
+    "connection",
+    "unable to connect",
+    "tunnel",
+    "unreachable",
+    "reset by peer",
+)
+
+pools: Dict[str, "ProxyPool"] = {}
+
+
+class ProxyPool:
+    """
+    Proxies for one client, chosen with weight 1 / latency scaled by their
+    success rate. PROXY_FAIL_LIMIT failures in a row open a proxy's circuit
+    for PROXY_COOLDOWN seconds; after that it gets one trial request, which closes
+    the circuit again or reopens it for twice as long. Every pool probes its
+    proxies against PROXY_PROBE_URL each PROXY_PROBE_INTERVAL seconds.
+    """
+
+    def __init__(self, name: str, proxies: List[str]):
+        self.name = name
+        # proxy -> {"latency", "errors", "streak", "trips", "until", "bytes", "busy", "ok", "failed"}
+        self.proxies: Dict[str, Dict[str, Any]] = {
+            proxy: {
+                "latency": None,
+                "errors": 0.0,
+                "streak": 0,
+                "trips": 0,
+                "until": 0.0,
+                "bytes": 0,
+                "busy": 0.0,
+                "ok": 0,
+                "failed": 0,
+            }
+            for proxy in proxies
+        }
+        self._probing = False
+        pools[name] = self
+
+    def _weight(self, state: Dict[str, Any]) -> float:
+        # Unprobed proxies count as 1s so they are tried, not starved.
+        latency = state["latency"] or 1.0
+        return max(1.0 - state["errors"], 0.05) / max(latency, 0.01)
+
+    def pick(self) -> Optional[str]:
+        """A proxy to use now, or None when the pool is empty."""
+        if not self.proxies:
+            return None
+        self._start_probing()
+        now = time.monotonic()
+        closed = [p for p, s in self.proxies.items() if s["until"] <= now]
+        if not closed:
+            # Every circuit is open, the one reopening first is the best bet.
+            return min(self.proxies, key=lambda p: self.proxies[p]["until"])
+        weights = [self._weight(self.proxies[p]) for p in closed]
+        return random.choices(closed, weights)[0]
+
+    def report(
+        self,
+        proxy: Optional[str],
+        error: Optional[str] = None,
+        latency: Optional[float] = None,
+        nbytes: int = 0,
+        elapsed: float = 0.0,
+    ):
+        """
+        Record one request through ``proxy``. ``error`` is the failure text,
+        None on success; failures that aren't network errors are ignored.
+        ``nbytes`` over ``elapsed`` seconds feed the throughput figure.
+        """
+        state = self.proxies.get(proxy)
+        if state is None:
+            return
+        if error is not None:
+            if not any(word in error.lower() for word in NETWORK_ERRORS):
+                return
+            state["failed"] += 1
+            state["errors"] += ALPHA * (1.0 - state["errors"])
+            state["streak"] += 1
+            if state["until"] > time.monotonic():
+                return
+            if state["streak"] >= PROXY_FAIL_LIMIT or state["trips"]:
+                self._trip(proxy, state)
+            return
+        state["ok"] += 1
+        state["errors"] -= ALPHA * state["errors"]
+        state["streak"] = 0
+        state["trips"] = 0
+        if latency is not None:
+            previous = state["latency"]
+            state["latency"] = (
+                latency if previous is None else previous + ALPHA * (latency - previous)
+            )
+        state["bytes"] += nbytes
+        state["busy"] += elapsed
+
+    def _trip(self, proxy: str, state: Dict[str, Any]):
+        state["trips"] += 1
+        state["streak"] = 0
+        cooldown = PROXY_COOLDOWN * 2 ** min(state["trips"] - 1, 5)
+        state["until"] = time.monotonic() + cooldown
+        logger.warning(f"{self.name} proxy {proxy} failing, benched for {cooldown}s")
+
+    async def probe(self, proxy: str):
+        if not proxy.startswith("http"):
+            # aiohttp can only probe http(s) proxies, socks ones learn from use.
+            return
+        start = time.monotonic()
+        try:
+            async with await request(
+                "GET",
+                PROXY_PROBE_URL,
+                retries=0,
+                proxy=proxy,
+                timeout=aiohttp.ClientTimeout(total=PROXY_PROBE_TIMEOUT),
+            ) as resp:
+                await resp.read()
+                if resp.status >= 500:
+                    raise ConnectionError(f"probe got HTTP {resp.status}")
+        except Exception as e:
+            self.report(proxy, error=f"connection: {e}")
+            return
+        self.report(proxy, latency=time.monotonic() - start)
+
+    async def probe_all(self):
+        try:
+            await asyncio.gather(*(self.probe(proxy) for proxy in self.proxies))
+        finally:
+            schedule(("proxyprobe", self.name), PROXY_PROBE_INTERVAL, self.probe_all)
+
+    def _start_probing(self):
+        if self._probing or PROXY_PROBE_INTERVAL <= 0:
+            return
+        self._probing = True
+        schedule(("proxyprobe", self.name), 0, self.probe_all)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        result = {}
+        for proxy, state in self.proxies.items():
+            result[proxy.split("@")[-1]] = {
+                "latency": round(state["latency"] * 1000) if state["latency"] else None,
+                "error_rate": round(state["errors"] * 100, 1),
+                "throughput": round(state["bytes"] / state["busy"] / 1024)
+                if state["busy"]
+                else 0,
+                "ok": state["ok"],
+                "failed": state["failed"],
+                "benched": max(int(state["until"] - now), 0),
+            }
+        return result
+
+
+def proxy_stats() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    return {name: pool.stats() for name, pool in pools.items() if pool.proxies}
@@ -1,5 +1,6 @@
 import os
 
+from VIPMUSIC.utils.mediacache import media_cache
 from config import autoclean
 
 
@@ -7,6 +8,10 @@ async def auto_clean(popped):
     try:
         rem = popped["file"]
         autoclean.remove(rem)
+        # Cached downloads stay on disk for the next chat, the media cache
+        # unpins them and evicts whatever no longer fits its budget.
+        if media_cache.release(rem):
+            return
         count = autoclean.count(rem)
         if count == 0:
             if "vid_" not in rem or "live_" not in rem or "index_" not in rem:
@@ -0,0 +1,122 @@
+import asyncio
+
+from VIPMUSIC import LOGGER, YouTube
+from VIPMUSIC.misc import db
+from VIPMUSIC.utils.mediacache import media_cache
+from VIPMUSIC.utils.thumbnails import prerender
+from config import PREFETCH_AHEAD, PREFETCH_WORKERS, autoclean
+
+# How often every queue is swept for placeholders nobody scheduled yet.
+SWEEP_INTERVAL = 15
+
+_slots = asyncio.Semaphore(PREFETCH_WORKERS)
+# chat_id -> prefetch task currently walking that chat's queue
+_tasks = {}
+_sweeper = None
+prefetch_stats = {"prefetched": 0, "failed": 0}
+
+
+def _point(entry, file_path: str):
+    """Move ``entry`` and its autoclean and media cache references to ``file_path``."""
+    placeholder = entry["file"]
+    entry["file"] = file_path
+    try:
+        autoclean.remove(placeholder)
+    except ValueError:
+        pass
+    autoclean.append(file_path)
+    media_cache.pin(file_path)
+
+
+def _swap(chat_id: int, placeholder: str, file_path: str, streamtype: str):
+    """Point every upcoming entry still using ``placeholder`` at the real file."""
+    for entry in db.get(chat_id, [])[1:]:
+        if entry["file"] != placeholder or entry["streamtype"] != streamtype:
+            continue
+        _point(entry, file_path)
+
+
+def claim_download(chat_id: int, placeholder: str, file_path: str):
+    """
+    Point the playing entry, queued as a ``vid_`` placeholder, at the file
+    just downloaded for it, so the media cache keeps it while it plays and
+    auto_clean releases it afterwards.
+    """
+    check = db.get(chat_id)
+    if not check or check[0]["file"] != placeholder:
+        return
+    _point(check[0], file_path)
+
+
+async def _prefetch(chat_id: int):
+    for entry in db.get(chat_id, [])[1 : PREFETCH_AHEAD + 1]:
+        prerender(entry["vidid"])
+    done = set()
+    while True:
+        upcoming = [
+            entry
+            for entry in db.get(chat_id, [])[1 : PREFETCH_AHEAD + 1]
+            if str(entry["file"]).startswith("vid_")
+            and (entry["file"], entry["streamtype"]) not in done
+        ]
+        if not upcoming:
+            return
+        entry = upcoming[0]
+        placeholder, streamtype = entry["file"], entry["streamtype"]
+        done.add((placeholder, streamtype))
+        try:
+            async with _slots:
+                file_path, direct = await YouTube.download(
+                    entry["vidid"],
+                    None,
+                    videoid=True,
+                    video=True if str(streamtype) == "video" else False,
+                )
+        except Exception as e:
+            LOGGER(__name__).warning(f"Prefetch of {entry['vidid']} failed: {e}")
+            file_path, direct = None, False
+        if file_path and direct:
+            _swap(chat_id, placeholder, file_path, streamtype)
+            prefetch_stats["prefetched"] += 1
+        else:
+            prefetch_stats["failed"] += 1
+
+
+def _finished(chat_id: int, task: asyncio.Task):
+    if _tasks.get(chat_id) is task:
+        del _tasks[chat_id]
+    if not task.cancelled() and task.exception():
+        LOGGER(__name__).warning(f"Prefetcher for {chat_id} crashed: {task.exception()}")
+
+
+def schedule_prefetch(chat_id: int):
+    """
+    Download the next PREFETCH_AHEAD queued tracks of ``chat_id`` and render
+    their thumbnails in the background.
+    """
+    global _sweeper
+    if PREFETCH_AHEAD <= 0 or chat_id in _tasks:
+        return
+    if _sweeper is None:
+        _sweeper = asyncio.create_task(prefetch_sweeper())
+    task = asyncio.create_task(_prefetch(chat_id))
+    _tasks[chat_id] = task
+    task.add_done_callback(lambda t: _finished(chat_id, t))
+
+
+def cancel_prefetch(chat_id: int):
+    task = _tasks.pop(chat_id, None)
+    if task:
+        task.cancel()
+
+
+async def prefetch_sweeper():
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL)
+        for chat_id in list(db):
+            if any(
+                str(entry["file"]).startswith("vid_")
+                for entry in db.get(chat_id, [])[1 : PREFETCH_AHEAD + 1]
+            ):
+                schedule_prefetch(chat_id)
+
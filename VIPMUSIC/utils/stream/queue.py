@@ -3,6 +3,9 @@ from typing import Union
 
 from VIPMUSIC.misc import db
 from VIPMUSIC.utils.formatters import check_duration, seconds_to_min
+from VIPMUSIC.utils.mediacache import media_cache
+from VIPMUSIC.utils.stream.prefetch import schedule_prefetch
+from VIPMUSIC.utils.stream.queueitem import ChatQueue, QueueItem
 from config import autoclean, time_to_seconds
 
 
@@ -23,28 +26,29 @@ async def put_queue(
         duration_in_seconds = time_to_seconds(duration) - 3
     except:
         duration_in_seconds = 0
-    put = {
-        "title": title,
-        "dur": duration,
-        "streamtype": stream,
-        "by": user,
-        "user_id": user_id,
-        "chat_id": original_chat_id,
-        "file": file,
-        "vidid": vidid,
-        "seconds": duration_in_seconds,
-        "played": 0,
-    }
+    put = QueueItem(
+        title,
+        duration,
+        stream,
+        user,
+        user_id,
+        original_chat_id,
+        file,
+        vidid,
+        duration_in_seconds,
+    )
     if forceplay:
         check = db.get(chat_id)
         if check:
-            check.insert(0, put)
+            check.appendleft(put)
         else:
-            db[chat_id] = []
+            db[chat_id] = ChatQueue()
             db[chat_id].append(put)
     else:
         db[chat_id].append(put)
     autoclean.append(file)
+    media_cache.pin(file)
+    schedule_prefetch(chat_id)
 
 
 async def put_queue_index(
@@ -69,23 +73,15 @@ async def put_queue_index(
             dur = 0
     else:
         dur = 0
-    put = {
-        "title": title,
-        "dur": duration,
-        "streamtype": stream,
-        "by": user,
-        "chat_id": original_chat_id,
-        "file": file,
-        "vidid": vidid,
-        "seconds": dur,
-        "played": 0,
-    }
+    put = QueueItem(
+        title, duration, stream, user, None, original_chat_id, file, vidid, dur
+    )
     if forceplay:
         check = db.get(chat_id)
         if check:
-            check.insert(0, put)
+            check.appendleft(put)
         else:
-            db[chat_id] = []
+            db[chat_id] = ChatQueue()
             db[chat_id].append(put)
     else:
         db[chat_id].append(put)
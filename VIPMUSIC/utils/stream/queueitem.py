@@ -0,0 +1,118 @@
+import random
+from collections import deque
+from itertools import islice
+from typing import Any
+
+
+class QueueItem:
+    """
+    One queued track. Slotted instead of a dict so a 2500 track playlist stays
+    small; item["key"] access is kept so existing handlers work unchanged.
+    The now-playing message is stored as its id, not the Message object.
+    """
+
+    __slots__ = (
+        "title",
+        "dur",
+        "streamtype",
+        "by",
+        "user_id",
+        "chat_id",
+        "file",
+        "vidid",
+        "seconds",
+        "old_dur",
+        "old_second",
+        "speed_path",
+        "speed",
+        "_mystic",
+        "markup",
+    )
+
+    def __init__(
+        self,
+        title,
+        dur,
+        streamtype,
+        by,
+        user_id,
+        chat_id,
+        file,
+        vidid,
+        seconds,
+    ):
+        self.title = title
+        self.dur = dur
+        self.streamtype = streamtype
+        self.by = by
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.file = file
+        self.vidid = vidid
+        self.seconds = seconds
+        self.old_dur = None
+        self.old_second = None
+        self.speed_path = None
+        self.speed = None
+        self._mystic = None
+        self.markup = None
+
+    @property
+    def mystic(self):
+        return self._mystic
+
+    @mystic.setter
+    def mystic(self, message):
+        self._mystic = getattr(message, "id", message)
+
+    def __getitem__(self, key: str) -> Any:
+        if key.startswith("_") or key not in self.__slots__ and key != "mystic":
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key.startswith("_") or key not in self.__slots__ and key != "mystic":
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+
+class ChatQueue(deque):
+    """
+    A chat's queue in misc.db. Keeps the list calls the handlers use
+    (``pop(0)``, ``insert(0, x)``, ``[a:b]``) but on a deque, so taking the
+    head or pushing a forced track is O(1) regardless of playlist length.
+    """
+
+    def pop(self, index: int = -1):
+        if index == 0:
+            return self.popleft()
+        if index == -1 or index == len(self) - 1:
+            return super().pop()
+        item = self[index]
+        del self[index]
+        return item
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            return list(islice(self, start, stop, step))
+        return super().__getitem__(index)
+
+    def shuffle_upcoming(self):
+        """Shuffle everything after the playing track in place."""
+        if len(self) < 3:
+            return
+        # Deque indexing is O(n) away from the ends, shuffle a list copy instead.
+        upcoming = list(islice(self, 1, None))
+        random.shuffle(upcoming)
+        head = self.popleft()
+        self.clear()
+        self.append(head)
+        self.extend(upcoming)
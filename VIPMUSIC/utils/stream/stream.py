@@ -1,4 +1,7 @@
+import asyncio
 import os
+import time
+from collections import deque
 from random import randint
 from typing import Union
 
@@ -13,7 +16,60 @@ from VIPMUSIC.utils.exceptions import AssistantErr
 from VIPMUSIC.utils.inline import aq_markup, queuemarkup, close_markup, stream_markup, stream_markup2
 from VIPMUSIC.utils.pastebin import VIPBin
 from VIPMUSIC.utils.stream.queue import put_queue, put_queue_index
-from youtubesearchpython.__future__ import VideosSearch
+from VIPMUSIC.utils.stream.queueitem import ChatQueue
+from VIPMUSIC.utils.trackmap import TrackQuery, remember
+from VIPMUSIC.utils.videometa import thumb_url
+
+
+# Minimum seconds between "added N tracks" edits while a playlist is queued.
+PLAYLIST_PROGRESS_INTERVAL = 8
+
+
+async def resolve_playlist(result, spotify: Union[bool, str] = None):
+    """
+    Look up playlist entries PLAYLIST_RESOLVE_WORKERS at a time and yield
+    their details in playlist order, None for entries that failed. Lookups
+    run ahead of the consumer, so queueing one track overlaps with resolving
+    the next ones.
+    """
+
+    async def lookup(search):
+        try:
+            details = await YouTube.details(search, False if spotify else True)
+        except Exception:
+            return None
+        if isinstance(search, TrackQuery):
+            # Remember which video this track matched, see utils/trackmap.
+            await remember(search.keys, details[4])
+        return details
+
+    entries = iter(result)
+    pending = deque()
+
+    def fill():
+        while len(pending) < config.PLAYLIST_RESOLVE_WORKERS:
+            search = next(entries, None)
+            if search is None:
+                return
+            pending.append(asyncio.ensure_future(lookup(search)))
+
+    try:
+        fill()
+        while pending:
+            details = await pending.popleft()
+            fill()
+            yield details
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def report_playlist(_, mystic, count: int, msg: str):
+    try:
+        link = await VIPBin(msg)
+        await mystic.edit_text(_["play_21"].format(count, link))
+    except Exception:
+        pass
 
 
 async def stream(
@@ -36,83 +92,84 @@ async def stream(
     if streamtype == "playlist":
         msg = f"{_['play_19']}\n\n"
         count = 0
-        for search in result:
-            if int(count) == config.PLAYLIST_FETCH_LIMIT:
-                continue
-            try:
-                (
-                    title,
-                    duration_min,
-                    duration_sec,
-                    thumbnail,
-                    vidid,
-                ) = await YouTube.details(search, False if spotify else True)
-            except:
-                continue
-            if str(duration_min) == "None":
-                continue
-            if duration_sec > config.DURATION_LIMIT:
-                continue
-            if await is_active_chat(chat_id):
-                await put_queue(
-                    chat_id,
-                    original_chat_id,
-                    f"vid_{vidid}",
-                    title,
-                    duration_min,
-                    user_name,
-                    vidid,
-                    user_id,
-                    "video" if video else "audio",
-                )
-                position = len(db.get(chat_id)) - 1
-                count += 1
-                msg += f"{count}. {title[:70]}\n"
-                msg += f"{_['play_20']} {position}\n\n"
-            else:
-                if not forceplay:
-                    db[chat_id] = []
-                status = True if video else None
-                try:
-                    file_path, direct = await YouTube.download(
-                        vidid, mystic, video=status, videoid=True
+        reported = time.monotonic()
+        playlist = resolve_playlist(result, spotify)
+        try:
+            async for details in playlist:
+                if int(count) == config.PLAYLIST_FETCH_LIMIT:
+                    break
+                if count and time.monotonic() - reported >= PLAYLIST_PROGRESS_INTERVAL:
+                    reported = time.monotonic()
+                    await report_playlist(_, mystic, count, msg)
+                if details is None:
+                    continue
+                title, duration_min, duration_sec, thumbnail, vidid = details
+                if str(duration_min) == "None":
+                    continue
+                if duration_sec > config.DURATION_LIMIT:
+                    continue
+                if await is_active_chat(chat_id):
+                    await put_queue(
+                        chat_id,
+                        original_chat_id,
+                        f"vid_{vidid}",
+                        title,
+                        duration_min,
+                        user_name,
+                        vidid,
+                        user_id,
+                        "video" if video else "audio",
                     )
-                except:
-                    raise AssistantErr(_["play_14"])
-                await VIP.join_call(
-                    chat_id,
-                    original_chat_id,
-                    file_path,
-                    video=status,
-                    image=thumbnail,
-                )
-                await put_queue(
-                    chat_id,
-                    original_chat_id,
-                    file_path if direct else f"vid_{vidid}",
-                    title,
-                    duration_min,
-                    user_name,
-                    vidid,
-                    user_id,
-                    "video" if video else "audio",
-                    forceplay=forceplay,
-                )
-                img = await get_thumb(vidid)
-                button = stream_markup(_, vidid, chat_id)
-                run = await app.send_photo(
-                    original_chat_id,
-                    photo=img,
-                    caption=_["stream_1"].format(
-                        f"https://t.me/{app.username}?start=info_{vidid}",
-                        title[:23],
+                    position = len(db.get(chat_id)) - 1
+                    count += 1
+                    msg += f"{count}. {title[:70]}\n"
+                    msg += f"{_['play_20']} {position}\n\n"
+                else:
+                    if not forceplay:
+                        db[chat_id] = ChatQueue()
+                    status = True if video else None
+                    try:
+                        file_path, direct = await YouTube.download(
+                            vidid, mystic, video=status, videoid=True
+                        )
+                    except:
+                        raise AssistantErr(_["play_14"])
+                    await VIP.join_call(
+                        chat_id,
+                        original_chat_id,
+                        file_path,
+                        video=status,
+                        image=thumbnail,
+                    )
+                    await put_queue(
+                        chat_id,
+                        original_chat_id,
+                        file_path if direct else f"vid_{vidid}",
+                        title,
                         duration_min,
-                        user_name), reply_markup=InlineKeyboardMarkup(button))
+                        user_name,
+                        vidid,
+                        user_id,
+                        "video" if video else "audio",
+                        forceplay=forceplay,
+                    )
+                    img = await thumb_url(vidid)
+                    button = stream_markup(_, vidid, chat_id)
+                    run = await app.send_photo(
+                        original_chat_id,
+                        photo=img,
+                        caption=_["stream_1"].format(
+                            f"https://t.me/{app.username}?start=info_{vidid}",
+                            title[:23],
+                            duration_min,
+                            user_name), reply_markup=InlineKeyboardMarkup(button))
                 
                     
                 
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "stream"
+                    db[chat_id][0]["mystic"] = run
+                    db[chat_id][0]["markup"] = "stream"
+        finally:
+            await playlist.aclose()
         if count == 0:
             return
         else:
@@ -155,7 +212,7 @@ async def stream(
                 user_id,
                 "video" if video else "audio",
             )
-            img = await get_thumb(vidid)
+            img = await thumb_url(vidid)
             position = len(db.get(chat_id)) - 1
             button = queuemarkup(_, vidid, chat_id)
             await app.send_photo(
@@ -166,7 +223,7 @@ async def stream(
             )
         else:
             if not forceplay:
-                db[chat_id] = []
+                db[chat_id] = ChatQueue()
             await VIP.join_call(
                 chat_id,
                 original_chat_id,
@@ -186,7 +243,7 @@ async def stream(
                 "video" if video else "audio",
                 forceplay=forceplay,
             )
-            img = await get_thumb(vidid)
+            img = await thumb_url(vidid)
             button = stream_markup(_, vidid, chat_id)
             run = await app.send_photo(
                 original_chat_id,
@@ -224,7 +281,7 @@ async def stream(
             )
         else:
             if not forceplay:
-                db[chat_id] = []
+                db[chat_id] = ChatQueue()
             await VIP.join_call(chat_id, original_chat_id, file_path, video=None)
             await put_queue(
                 chat_id,
@@ -276,7 +333,7 @@ async def stream(
             )
         else:
             if not forceplay:
-                db[chat_id] = []
+                db[chat_id] = ChatQueue()
             await VIP.join_call(chat_id, original_chat_id, file_path, video=status)
             await put_queue(
                 chat_id,
@@ -329,7 +386,7 @@ async def stream(
             )
         else:
             if not forceplay:
-                db[chat_id] = []
+                db[chat_id] = ChatQueue()
             n, file_path = await YouTube.video(link)
             if n == 0:
                 raise AssistantErr(_["str_3"])
@@ -352,7 +409,7 @@ async def stream(
                 "video" if video else "audio",
                 forceplay=forceplay,
             )
-            img = await get_thumb(vidid)
+            img = await thumb_url(vidid)
             button = stream_markup2(_, chat_id)
             run = await app.send_photo(
                 original_chat_id,
@@ -390,7 +447,7 @@ async def stream(
             )
         else:
             if not forceplay:
-                db[chat_id] = []
+                db[chat_id] = ChatQueue()
             await VIP.join_call(
                 chat_id,
                 original_chat_id,
@@ -418,34 +475,3 @@ async def stream(
             db[chat_id][0]["mystic"] = run
             db[chat_id][0]["markup"] = "tg"
             await mystic.delete()
-
-
-
-
-
-# Function to get thumbnail by video ID
-async def get_thumb(videoid):
-    try:
-        # Search for the video using video ID
-        query = f"https://www.youtube.com/watch?v={videoid}"
-        results = VideosSearch(query, limit=1)
-        for result in (await results.next())["result"]:
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-        return thumbnail
-    except Exception as e:
-        return config.YOUTUBE_IMG_URL
-
-
-async def get_thumb(vidid):
-    try:
-        # Search for the video using video ID
-        query = f"https://www.youtube.com/watch?v={vidid}"
-        results = VideosSearch(query, limit=1)
-        for result in (await results.next())["result"]:
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-        return thumbnail
-    except Exception as e:
-        return config.YOUTUBE_IMG_URL
-    
-
-                
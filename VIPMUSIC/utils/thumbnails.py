@@ -1,18 +1,20 @@
+import asyncio
 import os
 import re
 import random
-
-import aiofiles
-import aiohttp
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 
 from PIL import Image, ImageDraw, ImageEnhance
 from PIL import ImageFilter, ImageFont, ImageOps
 
 from unidecode import unidecode
-from youtubesearchpython.__future__ import VideosSearch
 
 from VIPMUSIC import app
-from config import YOUTUBE_IMG_URL
+from VIPMUSIC.utils.httpclient import request
+from VIPMUSIC.utils.mediacache import MediaCache
+from VIPMUSIC.utils.videometa import lookup
+from config import THUMB_CACHE_SIZE, THUMB_WORKERS, YOUTUBE_IMG_URL
 
 
 def changeImageSize(maxWidth, maxHeight, image):
@@ -33,104 +35,65 @@ def clear(text):
     return title.strip()
 
 
-async def get_thumb(videoid):
-    if os.path.isfile(f"cache/{videoid}.png"):
-        return f"cache/{videoid}.png"
+THUMB_DIR = "cache"
+# Rendered now-playing cards are kept here, bounded like downloads/.
+thumb_cache = MediaCache(
+    "thumbnails", os.path.join(THUMB_DIR, "thumbs.json"), THUMB_CACHE_SIZE * 1024**2
+)
+_pool = ThreadPoolExecutor(THUMB_WORKERS, thread_name_prefix="thumb")
+# videoid -> render currently running for it
+_renders = {}
+
+
+def _render(raw: bytes, path: str):
+    youtube = Image.open(BytesIO(raw))
+    image1 = changeImageSize(1280, 720, youtube)
+    bg_bright = ImageEnhance.Brightness(image1)
+    bg_logo = bg_bright.enhance(1.1)
+    bg_contra = ImageEnhance.Contrast(bg_logo)
+    bg_logo = bg_contra.enhance(1.1)
+    background = changeImageSize(1280, 720, bg_logo)
+    tmp = f"{path}.part"
+    background.save(tmp, format="PNG")
+    os.replace(tmp, path)
+
 
-    url = f"https://www.youtube.com/watch?v={videoid}"
+async def _make_thumb(videoid):
+    path = os.path.join(THUMB_DIR, f"{videoid}.png")
     try:
-        results = VideosSearch(url, limit=1)
-        for result in (await results.next())["result"]:
-            try:
-                title = result["title"]
-                title = re.sub("\W+", " ", title)
-                title = title.title()
-            except:
-                title = "Unsupported Title"
-            try:
-                duration = result["duration"]
-            except:
-                duration = "Unknown Mins"
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-            try:
-                views = result["viewCount"]["short"]
-            except:
-                views = "Unknown Views"
-            try:
-                channel = result["channel"]["name"]
-            except:
-                channel = "Unknown Channel"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(thumbnail) as resp:
-                if resp.status == 200:
-                    f = await aiofiles.open(f"cache/thumb{videoid}.png", mode="wb")
-                    await f.write(await resp.read())
-                    await f.close()
-
-        
-       # colors = ["white", "red", "orange", "yellow", "green", "cyan", "azure", "blue", "violet", "magenta", "pink"]
-       # border = random.choice(colors)
-        youtube = Image.open(f"cache/thumb{videoid}.png")
-        image1 = changeImageSize(1280, 720, youtube)
-        bg_bright = ImageEnhance.Brightness(image1)
-        bg_logo = bg_bright.enhance(1.1)
-        bg_contra = ImageEnhance.Contrast(bg_logo)
-        bg_logo = bg_contra.enhance(1.1)
-        #logox = ImageOps.expand(bg_logo, border=7, fill=f"{border}")
-        background = changeImageSize(1280, 720, bg_logo)
-        # image2 = image1.convert("RGBA")
-        # background = image2.filter(filter=ImageFilter.BoxBlur(1))
-        #enhancer = ImageEnhance.Brightness(background)
-        #background = enhancer.enhance(0.9)
-        #draw = ImageDraw.Draw(background)
-        #arial = ImageFont.truetype("VIPMUSIC/assets/font2.ttf", 30)
-        #font = ImageFont.truetype("VIPMUSIC/assets/font.ttf", 30)
-        # draw.text((1110, 8), unidecode(app.name), fill="white", font=arial)
-        """
-        draw.text(
-            (1, 1),
-            f"{channel} | {views[:23]}",
-            (1, 1, 1),
-            font=arial,
-        )
-        draw.text(
-            (1, 1),
-            clear(title),
-            (1, 1, 1),
-            font=font,
-        )
-        draw.line(
-            [(1, 1), (1, 1)],
-            fill="white",
-            width=1,
-            joint="curve",
-        )
-        draw.ellipse(
-            [(1, 1), (2, 1)],
-            outline="white",
-            fill="white",
-            width=1,
-        )
-        draw.text(
-            (1, 1),
-            "00:00",
-            (1, 1, 1),
-            font=arial,
-        )
-        draw.text(
-            (1, 1),
-            f"{duration[:23]}",
-            (1, 1, 1),
-            font=arial,
-        )
-        """
-        try:
-            os.remove(f"cache/thumb{videoid}.png")
-        except:
-            pass
-        background.save(f"cache/{videoid}.png")
-        return f"cache/{videoid}.png"
+        result = await lookup(f"https://www.youtube.com/watch?v={videoid}")
+        async with await request("GET", result["thumb"]) as resp:
+            if resp.status != 200:
+                return YOUTUBE_IMG_URL
+            raw = await resp.read()
+        await asyncio.get_running_loop().run_in_executor(_pool, _render, raw, path)
+        thumb_cache.add(path)
+        return path
     except Exception as e:
         print(e)
         return YOUTUBE_IMG_URL
+
+
+async def get_thumb(videoid):
+    """
+    Path of the now-playing card for ``videoid``. Rendering happens in the
+    thumbnail pool, and callers asking for the same id at once share one
+    render.
+    """
+    path = os.path.join(THUMB_DIR, f"{videoid}.png")
+    if thumb_cache.lookup(path):
+        return path
+    render = _renders.get(videoid)
+    if render is None:
+        render = _renders[videoid] = asyncio.ensure_future(_make_thumb(videoid))
+        render.add_done_callback(lambda _: _renders.pop(videoid, None))
+    return await asyncio.shield(render)
+
+
+def prerender(videoid):
+    """Render the card for a queued YouTube track in the background."""
+    if not re.fullmatch(r"[0-9A-Za-z_-]{11}", str(videoid)):
+        return
+    if videoid in _renders or os.path.isfile(os.path.join(THUMB_DIR, f"{videoid}.png")):
+        return
+    asyncio.ensure_future(get_thumb(videoid))
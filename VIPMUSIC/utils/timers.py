@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable
+
+from VIPMUSIC.logging import LOGGER
+
+# key -> handle of the pending timer registered under it. The timers themselves
+# live in the event loop's own heap, so nothing polls while they wait.
+_timers: Dict[Hashable, asyncio.TimerHandle] = {}
+
+
+def _fire(key: Hashable, callback: Callable, args: tuple):
+    _timers.pop(key, None)
+    try:
+        result = callback(*args)
+    except Exception as e:
+        LOGGER(__name__).error(f"Timer {key} failed: {e}")
+        return
+    if asyncio.iscoroutine(result):
+        task = asyncio.ensure_future(result)
+        task.add_done_callback(lambda t: _done(key, t))
+
+
+def _done(key: Hashable, task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        LOGGER(__name__).error(f"Timer {key} failed: {task.exception()}")
+
+
+def schedule(key: Hashable, delay: float, callback: Callable, *args: Any):
+    """
+    Run ``callback(*args)`` after ``delay`` seconds; coroutine functions are
+    awaited in their own task. Scheduling an existing key reschedules it.
+    """
+    cancel(key)
+    loop = asyncio.get_event_loop()
+    _timers[key] = loop.call_later(max(delay, 0), _fire, key, callback, args)
+
+
+def cancel(key: Hashable) -> bool:
+    handle = _timers.pop(key, None)
+    if handle is None:
+        return False
+    handle.cancel()
+    return True
+
+
+def is_scheduled(key: Hashable) -> bool:
+    return key in _timers
+
+
+def pending_timers() -> int:
+    return len(_timers)
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from VIPMUSIC.core.mongo import mongodb
+from VIPMUSIC.logging import LOGGER
+from VIPMUSIC.utils.cache import TTLCache
+from VIPMUSIC.utils.videometa import normalize
+from config import TRACK_MAP_TTL, VIDEO_META_CACHE_SIZE
+
+trackmapdb = mongodb.trackmap
+
+# "isrc:<code>" or "title:<normalized query>" -> YouTube video id
+track_map = TTLCache("track_map", VIDEO_META_CACHE_SIZE, TRACK_MAP_TTL)
+_indexed = False
+
+
+class TrackQuery(str):
+    """
+    A search query for a track from another platform. ``keys`` are the
+    mapping keys the video it resolves to gets remembered under.
+    """
+
+    keys: tuple = ()
+
+    def __new__(cls, query: str, keys: Iterable[str] = ()):
+        self = super().__new__(cls, query)
+        self.keys = tuple(keys)
+        return self
+
+
+def track_keys(query: str, isrc: Optional[str] = None) -> list:
+    keys = [f"title:{normalize(query)}"]
+    if isrc:
+        keys.insert(0, f"isrc:{isrc.upper()}")
+    return keys
+
+
+async def resolve_many(keys: Iterable[str]) -> Dict[str, str]:
+    """Known video ids for ``keys``, from memory and then one Mongo query."""
+    found = {}
+    missing = []
+    for key in keys:
+        vidid = track_map.get(key)
+        if vidid:
+            found[key] = vidid
+        else:
+            missing.append(key)
+    if not missing:
+        return found
+    global _indexed
+    try:
+        if not _indexed:
+            _indexed = True
+            # Mongo deletes mappings TRACK_MAP_TTL seconds after they were stored.
+            await trackmapdb.create_index("at", expireAfterSeconds=TRACK_MAP_TTL)
+        fresh = datetime.utcnow() - timedelta(seconds=TRACK_MAP_TTL)
+        async for doc in trackmapdb.find({"_id": {"$in": missing}, "at": {"$gt": fresh}}):
+            found[doc["_id"]] = doc["vidid"]
+            track_map.set(doc["_id"], doc["vidid"])
+    except Exception as e:
+        LOGGER(__name__).warning(f"Track mapping lookup failed: {e}")
+    return found
+
+
+async def resolve(keys: Iterable[str]) -> Optional[str]:
+    """The video id mapped to the first of ``keys`` that has one."""
+    keys = list(keys)
+    found = await resolve_many(keys)
+    for key in keys:
+        if key in found:
+            return found[key]
+    return None
+
+
+async def remember(keys: Iterable[str], vidid: str):
+    for key in keys:
+        if track_map.get(key) == vidid:
+            continue
+        track_map.set(key, vidid)
+        try:
+            await trackmapdb.update_one(
+                {"_id": key},
+                {"$set": {"vidid": vidid, "at": datetime.utcnow()}},
+                upsert=True,
+            )
+        except Exception as e:
+            LOGGER(__name__).warning(f"Could not store track mapping {key}: {e}")
+
+
+async def queue_entries(tracks: List[Tuple[str, list]]) -> list:
+    """
+    Playlist entries for ``(query, keys)`` pairs: a YouTube link for tracks
+    already mapped to a video, a TrackQuery to search for the rest.
+    """
+    found = await resolve_many(key for _, keys in tracks for key in keys)
+    results = []
+    for query, keys in tracks:
+        vidid = next((found[key] for key in keys if key in found), None)
+        if vidid:
+            results.append(f"https://www.youtube.com/watch?v={vidid}")
+        else:
+            results.append(TrackQuery(query, keys))
+    return results
@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, List, Optional, Union
+
+from pyrogram.errors import PeerIdInvalid, UserIdInvalid, UsernameInvalid
+from pyrogram.types import User
+
+from VIPMUSIC import app
+from VIPMUSIC.logging import LOGGER
+from VIPMUSIC.utils.cache import TTLCache
+from config import USER_CACHE_SIZE, USER_CACHE_TTL
+
+# user_id -> pyrogram User, fed from every message the bot sees
+profiles = TTLCache("user_profiles", USER_CACHE_SIZE, USER_CACHE_TTL)
+# lowercased username -> user_id
+usernames = TTLCache("usernames", USER_CACHE_SIZE, USER_CACHE_TTL)
+# user_id -> True for ids Telegram refused to resolve, so they aren't retried every time
+unresolved = TTLCache("unresolved_users", USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+def remember_user(user: Optional[User]):
+    if not user or not getattr(user, "id", None):
+        return
+    profiles.set(user.id, user)
+    if user.username:
+        usernames.set(user.username.lower(), user.id)
+
+
+def remember_users(users: Iterable[User]):
+    for user in users:
+        remember_user(user)
+
+
+def cached_user(user: Union[int, str]) -> Optional[User]:
+    if isinstance(user, str) and not user.lstrip("-").isdigit():
+        user = usernames.get(user.lstrip("@").lower())
+        if user is None:
+            return None
+    return profiles.get(int(user))
+
+
+async def get_user(user: Union[int, str]) -> User:
+    """Cached ``app.get_users`` for a single id or username."""
+    cached = cached_user(user)
+    if cached:
+        return cached
+    fetched = await app.get_users(user)
+    remember_user(fetched)
+    return fetched
+
+
+async def _fetch(user_ids: List[int], out: List[User]):
+    """
+    ``app.get_users`` for ``user_ids``, appending to ``out``. One invalid id
+    fails the whole call, so on that error the batch is split in halves
+    until it is isolated. Any other error, like a FloodWait, is raised.
+    """
+    try:
+        fetched = await app.get_users(user_ids)
+    except (PeerIdInvalid, UsernameInvalid, UserIdInvalid):
+        if len(user_ids) == 1:
+            unresolved.set(user_ids[0], True)
+            return
+        half = len(user_ids) // 2
+        await _fetch(user_ids[:half], out)
+        await _fetch(user_ids[half:], out)
+        return
+    if isinstance(fetched, User):
+        fetched = [fetched]
+    out.extend(fetched)
+
+
+async def get_users(user_ids: List[int]) -> Dict[int, User]:
+    """
+    Resolve many ids at once; cache misses go out as one batched
+    ``app.get_users`` call. Ids Telegram can't resolve are left out, and
+    on a FloodWait or network error only what is already known is returned.
+    """
+    found = {}
+    missing = []
+    for user_id in user_ids:
+        cached = profiles.get(user_id)
+        if cached:
+            found[user_id] = cached
+        elif user_id not in missing and user_id not in unresolved:
+            missing.append(user_id)
+    if missing:
+        fetched = []
+        try:
+            await _fetch(missing, fetched)
+        except Exception as e:
+            LOGGER(__name__).warning(f"Could not fetch {len(missing)} users: {e}")
+        for user in fetched:
+            remember_user(user)
+            found[user.id] = user
+    return found
+
+
+def display_name(user: Optional[User], fallback) -> str:
+    if user and user.first_name:
+        return user.first_name
+    if user and user.username:
+        return user.username
+    return str(fallback)
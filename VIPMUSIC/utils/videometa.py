@@ -0,0 +1,159 @@
+import asyncio
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from youtubesearchpython.__future__ import VideosSearch
+
+from VIPMUSIC.core.mongo import mongodb
+from VIPMUSIC.logging import LOGGER
+from VIPMUSIC.utils.cache import TTLCache
+from config import VIDEO_META_CACHE_SIZE, VIDEO_META_TTL, YOUTUBE_IMG_URL
+
+videometadb = mongodb.videometa
+
+# video id -> {"id", "title", "duration", "thumb", "link", "views", "channel"}
+video_meta = TTLCache("video_meta", VIDEO_META_CACHE_SIZE, VIDEO_META_TTL)
+# normalized query -> video id of its first result, ("slider", query) -> ids
+video_queries = TTLCache("video_queries", VIDEO_META_CACHE_SIZE, VIDEO_META_TTL)
+# normalized query -> search currently running for it
+_searches: Dict[Any, asyncio.Future] = {}
+_indexed = False
+# Search queries remembered per video in Mongo, the oldest are dropped first.
+QUERIES_PER_VIDEO = 20
+
+VIDEO_ID = re.compile(r"(?:v=|youtu\.be/|shorts/|live/|embed/)([0-9A-Za-z_-]{11})")
+
+
+def normalize(query: str) -> str:
+    query = str(query)
+    if "://" in query:
+        query = query.split("&")[0]
+    return " ".join(query.split()).lower()
+
+
+def video_id(query: str) -> Optional[str]:
+    match = VIDEO_ID.search(str(query))
+    return match.group(1) if match else None
+
+
+def remember(result: dict) -> Dict[str, Any]:
+    """Cache one VideosSearch result and return it in the cached shape."""
+    try:
+        views = result["viewCount"]["short"]
+    except (KeyError, TypeError):
+        views = None
+    try:
+        channel = result["channel"]["name"]
+        channel_link = result["channel"]["link"]
+    except (KeyError, TypeError):
+        channel = channel_link = None
+    entry = {
+        "id": result["id"],
+        "title": result["title"],
+        "duration": result["duration"],
+        "thumb": result["thumbnails"][0]["url"].split("?")[0],
+        "link": result["link"],
+        "views": views,
+        "channel": channel,
+        "channel_link": channel_link,
+        "published": result.get("publishedTime"),
+    }
+    video_meta.set(entry["id"], entry)
+    return entry
+
+
+async def _load(vidid: Optional[str], key: str) -> Optional[Dict[str, Any]]:
+    global _indexed
+    if not _indexed:
+        _indexed = True
+        await videometadb.create_index("vidid")
+        await videometadb.create_index("queries")
+        # Mongo deletes entries VIDEO_META_TTL seconds after their last write.
+        await videometadb.create_index("updated", expireAfterSeconds=VIDEO_META_TTL)
+        # Older entries have no date, the index would never expire them.
+        await videometadb.delete_many({"updated": {"$exists": False}})
+    fresh = {"$gt": datetime.utcnow() - timedelta(seconds=VIDEO_META_TTL)}
+    if vidid:
+        doc = await videometadb.find_one({"vidid": vidid, "updated": fresh})
+    else:
+        doc = await videometadb.find_one({"queries": key, "updated": fresh})
+    if not doc:
+        return None
+    entry = doc["meta"]
+    video_meta.set(entry["id"], entry)
+    video_queries.set(key, entry["id"])
+    return entry
+
+
+async def _store(entry: Dict[str, Any], key: str):
+    await videometadb.update_one(
+        {"vidid": entry["id"]},
+        {
+            "$set": {"meta": entry, "updated": datetime.utcnow()},
+            "$push": {"queries": {"$each": [key], "$slice": -QUERIES_PER_VIDEO}},
+        },
+        upsert=True,
+    )
+
+
+async def _search(query: str, key: str) -> Optional[Dict[str, Any]]:
+    try:
+        entry = await _load(video_id(query), key)
+    except Exception as e:
+        LOGGER(__name__).warning(f"Video metadata lookup for {key} failed: {e}")
+        entry = None
+    if entry:
+        return entry
+    results = (await VideosSearch(query, limit=1).next())["result"]
+    if not results:
+        return None
+    entry = remember(results[0])
+    video_queries.set(key, entry["id"])
+    try:
+        await _store(entry, key)
+    except Exception as e:
+        LOGGER(__name__).warning(f"Could not store metadata of {entry['id']}: {e}")
+    return entry
+
+
+async def lookup(query: str) -> Optional[Dict[str, Any]]:
+    """
+    Metadata of the first YouTube result for ``query`` (a link or free
+    text), or None when nothing matched. Served from memory, then Mongo, and
+    only then from a search; callers asking for the same query at once share
+    that one search.
+    """
+    key = normalize(query)
+    vidid = video_id(query) or video_queries.get(key)
+    if vidid:
+        entry = video_meta.get(vidid)
+        if entry:
+            return entry
+    search = _searches.get(key)
+    if search is None:
+        search = _searches[key] = asyncio.ensure_future(_search(query, key))
+        search.add_done_callback(lambda _: _searches.pop(key, None))
+    return await asyncio.shield(search)
+
+
+async def thumb_url(videoid: str) -> str:
+    """YouTube's own thumbnail for ``videoid``, YOUTUBE_IMG_URL if it can't be found."""
+    try:
+        return (await lookup(f"https://www.youtube.com/watch?v={videoid}"))["thumb"]
+    except Exception:
+        return YOUTUBE_IMG_URL
+
+
+async def lookup_many(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """The first ``limit`` results for ``query``; every one of them is cached."""
+    key = ("slider", normalize(query))
+    ids = video_queries.get(key)
+    if ids:
+        entries = [video_meta.peek(vidid) for vidid in ids]
+        if all(entries):
+            return entries
+    results = (await VideosSearch(query, limit=limit).next()).get("result") or []
+    entries = [remember(result) for result in results]
+    video_queries.set(key, [entry["id"] for entry in entries])
+    return entries
@@ -0,0 +1,120 @@
+import asyncio
+import re
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from VIPMUSIC.logging import LOGGER
+from config import YTDLP_TIMEOUT, YTDLP_WORKERS
+
+logger = LOGGER(__name__)
+
+# Lines starting with this marker are progress reports, not yt-dlp output.
+PROGRESS_MARK = "[vipprogress]"
+PROGRESS_TEMPLATE = (
+    f"download:{PROGRESS_MARK} %(progress._percent_str)s|"
+    "%(progress._speed_str)s|%(progress._eta_str)s"
+)
+# Telegram rate-limits edits, so progress is reported at most this often.
+PROGRESS_INTERVAL = 5
+
+_slots = asyncio.Semaphore(YTDLP_WORKERS)
+job_stats = {"queued": 0, "running": 0, "done": 0, "failed": 0, "timeouts": 0}
+
+Progress = Callable[[str, str, str], Awaitable[None]]
+
+
+class YtDlpError(Exception):
+    pass
+
+
+async def _read_stdout(stream, progress: Optional[Progress]) -> List[str]:
+    lines = []
+    last = 0.0
+    while True:
+        raw = await stream.readline()
+        if not raw:
+            return lines
+        line = raw.decode("utf-8", "replace").rstrip("\n")
+        if not line.startswith(PROGRESS_MARK):
+            lines.append(line)
+            continue
+        if progress is None or time.monotonic() - last < PROGRESS_INTERVAL:
+            continue
+        last = time.monotonic()
+        fields = [re.sub(r"\x1b\[[0-9;]*m", "", f).strip() for f in line[len(PROGRESS_MARK):].split("|")]
+        if len(fields) == 3:
+            try:
+                await progress(*fields)
+            except Exception:
+                pass
+
+
+async def run_ytdlp(
+    args: List[str],
+    timeout: int = YTDLP_TIMEOUT,
+    progress: Optional[Progress] = None,
+) -> str:
+    """
+    Run one yt-dlp command in its own process. At most YTDLP_WORKERS run at
+    once, the rest wait their turn here. The process is killed when the job
+    times out or the awaiting task is cancelled, so a slow fallback never
+    holds the event loop. ``progress(percent, speed, eta)`` is awaited
+    while a download is running. Returns stdout, raises YtDlpError on failure.
+    """
+    job_stats["queued"] += 1
+    try:
+        await _slots.acquire()
+    finally:
+        job_stats["queued"] -= 1
+    job_stats["running"] += 1
+    proc = None
+    stderr = None
+    try:
+        cmd = ["yt-dlp", "--no-warnings"]
+        if progress is not None:
+            cmd += ["--newline", "--progress-template", PROGRESS_TEMPLATE]
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stderr = asyncio.ensure_future(proc.stderr.read())
+
+        async def finish():
+            lines = await _read_stdout(proc.stdout, progress)
+            await proc.wait()
+            return lines
+
+        try:
+            # One deadline covers both reading the output and the exit.
+            lines = await asyncio.wait_for(finish(), timeout)
+        except asyncio.TimeoutError:
+            job_stats["timeouts"] += 1
+            logger.warning(f"yt-dlp job killed after {timeout}s: {args[-1]}")
+            raise YtDlpError(f"yt-dlp timed out after {timeout}s")
+        err = (await stderr).decode("utf-8", "replace")
+        if proc.returncode != 0:
+            raise YtDlpError(err.strip().splitlines()[-1] if err.strip() else f"yt-dlp exited with {proc.returncode}")
+        job_stats["done"] += 1
+        return "\n".join(lines)
+    except BaseException:
+        job_stats["failed"] += 1
+        raise
+    finally:
+        if proc is not None and proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        if stderr is not None and not stderr.done():
+            stderr.cancel()
+        job_stats["running"] -= 1
+        _slots.release()
+
+
+def base_args(cookie_file: Optional[str], proxy: Optional[str]) -> List[str]:
+    args = []
+    if cookie_file:
+        args += ["--cookies", cookie_file]
+    if proxy:
+        args += ["--proxy", proxy]
+    return args
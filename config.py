@@ -53,6 +53,8 @@ SERVER_PLAYLIST_LIMIT = int(getenv("SERVER_PLAYLIST_LIMIT", "3000"))
 PLAYLIST_FETCH_LIMIT = int(getenv("PLAYLIST_FETCH_LIMIT", "2500"))
 # Set this to True if you want the assistant to automatically leave chats after an interval
 AUTO_LEAVING_ASSISTANT = False
+# Most group calls one assistant streams at once before new chats go elsewhere (0 = no cap)
+ASSISTANT_MAX_CALLS = int(getenv("ASSISTANT_MAX_CALLS", "0"))
 
 #Auto Gcast/Broadcast Handler (True = broadcast on , False = broadcast off During Hosting, Dont Do anything here.)
 AUTO_GCAST = os.getenv("AUTO_GCAST","True")
@@ -60,6 +62,14 @@ AUTO_GCAST = os.getenv("AUTO_GCAST","True")
 #Auto Broadcast Message That You Want Use In Auto Broadcast In All Groups.
 AUTO_GCAST_MSG = getenv("AUTO_GCAST_MSG", "<blockquote>⋆｡°✩ **𝐋ᴇᴛƨ𝐕ɪʙᴇ𝐎ᴜᴛ** ✩°｡⋆\n[𑫏ཉⅬᤌໍᤌ᭄ᰈⅬᤌໍᤌ𑂞ཉথ๓ํ](https://t.me/thedakkidaikathaval_bot)</blockquote>\n<blockquote>➽───𝐅ᴇᴧᴛᴜꝛᴇ𝗌-ɪɴ𝗌ɪᴅᴇ───❥\n🔻 ꝛᴏ𝗌ᴇ ғᴜηᴄᴛɪᴏɴ𝗌|ғᴇᴅ ❅ ꝛᴧηᴋɪɴɢ\n🔻 ᴡʜɪ𝗌ᴘᴇꝛ ϻ𝗌ɢ ❅ 𝗌ᴧηɢ-ϻᴧᴛᴧ\n🔻 ϻᴇɴᴛɪᴏη ❅ ᴄʜᴧᴛ|ꝛᴇᴧᴄᴛ\n─⋆｡°✩ **𝐋ᴏᴠᴇ-𝐌ᴧɢɪᴄ** ✩°｡⋆─\n🔻 ᴄᴏᴜᴘʟᴇ𝗌   ❅ ʟᴏᴠᴇ\n🔻 ғʟᴧϻᴇs     ❅ ᴜꝛᴜᴛᴛᴜ\n─⋆｡°✩ **𝐓ʜᴇ-𝐁ꝛᴇᴧᴋᴅᴏᴡɴ** ✩°｡⋆─\n🔻 ʟᴧɢ-ғʀᴇᴇ ϻᴜ𝗌ɪᴄ\n🔻 ᴠɪᴅᴇᴏ/ᴧᴜᴅɪᴏ ᴅᴏᴡηʟᴏᴧᴅ\n🔻 𝗌ᴜᴘᴘᴏꝛᴛ ʟɪηᴋs/ᴜꝛʟ'𝗌\n🔻 𝗌ᴜᴘᴘᴏꝛᴛ ʟɪᴠᴇ-𝗌ᴛʀᴇᴧϻ\n🔻 𝗌ᴜᴘᴘᴏꝛᴛ ɪɴ𝗌ᴛᴧ ᴅᴏᴡηʟᴏᴧᴅ𝗌</blockquote>\n<blockquote>𝆺𝅥 𝐃σит тσʋᴄн мʏ || [𝐂𝖗𝖚𝖘𝖍 🦇](https://t.me/rajeshrakis) ||</blockquote>")
 
+# Broadcast pacing: messages per second for the whole bot, senders run at once,
+# and seconds between two broadcast messages to the same chat
+BROADCAST_RATE = float(getenv("BROADCAST_RATE", "25"))
+BROADCAST_WORKERS = int(getenv("BROADCAST_WORKERS", "4"))
+BROADCAST_CHAT_INTERVAL = int(getenv("BROADCAST_CHAT_INTERVAL", "3"))
+# Chats asking for a longer FloodWait than this are skipped
+BROADCAST_MAX_WAIT = int(getenv("BROADCAST_MAX_WAIT", "900"))  # Seconds
+
 # Get this credentials from https://developer.spotify.com/dashboard
 SPOTIFY_CLIENT_ID = getenv("SPOTIFY_CLIENT_ID", "19609edb1b9f4ed7be0c8c1342039362")
 SPOTIFY_CLIENT_SECRET = getenv("SPOTIFY_CLIENT_SECRET", "409e31d3ddd64af08cfcc3b0f064fcbe")
@@ -67,6 +77,8 @@ SPOTIFY_CLIENT_SECRET = getenv("SPOTIFY_CLIENT_SECRET", "409e31d3ddd64af08cfcc3b
 
 # Maximum limit for fetching playlist's track from youtube, spotify, apple links.
 PLAYLIST_FETCH_LIMIT = int(getenv("PLAYLIST_FETCH_LIMIT", 2500))
+# Playlist entries looked up at once while queueing a playlist
+PLAYLIST_RESOLVE_WORKERS = int(getenv("PLAYLIST_RESOLVE_WORKERS", "8"))
 
 
 # Telegram audio and video file size limit (in bytes)
@@ -86,6 +98,74 @@ CLEANMODE_DELETE_MINS = int(
     getenv("CLEANMODE_MINS", "5")
 )  # Remember to give value in Seconds
 
+# In-memory per-chat settings cache (language, playmode, skipmode ...)
+CHAT_SETTINGS_CACHE_SIZE = int(getenv("CHAT_SETTINGS_CACHE_SIZE", "20000"))
+CHAT_SETTINGS_CACHE_TTL = int(
+    getenv("CHAT_SETTINGS_CACHE_TTL", "3600")
+)  # Remember to give value in Seconds
+
+# Cache of Telegram user profiles used for names and mentions
+USER_CACHE_SIZE = int(getenv("USER_CACHE_SIZE", "50000"))
+USER_CACHE_TTL = int(getenv("USER_CACHE_TTL", "21600"))  # Seconds
+
+# Disk budget for downloaded tracks kept in downloads/ for reuse across chats
+MEDIA_CACHE_SIZE = int(getenv("MEDIA_CACHE_SIZE", "2048"))  # Megabytes
+# Eviction order once the budget is exceeded: "lru" or "lfu"
+MEDIA_CACHE_POLICY = getenv("MEDIA_CACHE_POLICY", "lru").lower()
+
+# YouTube search results kept per video id and query, in memory and in Mongo
+VIDEO_META_CACHE_SIZE = int(getenv("VIDEO_META_CACHE_SIZE", "5000"))
+VIDEO_META_TTL = int(getenv("VIDEO_META_TTL", "43200"))  # Seconds
+# How long a Spotify or Apple track stays mapped to the YouTube video it matched
+TRACK_MAP_TTL = int(getenv("TRACK_MAP_TTL", "2592000"))  # Seconds
+# Spotify playlist and album pages fetched at once
+SPOTIFY_PAGE_WORKERS = int(getenv("SPOTIFY_PAGE_WORKERS", "4"))
+# Parsed Apple Music pages and downloaded SoundCloud tracks kept per link
+LINK_CACHE_SIZE = int(getenv("LINK_CACHE_SIZE", "500"))
+LINK_CACHE_TTL = int(getenv("LINK_CACHE_TTL", "3600"))  # Seconds
+# SoundCloud downloads run at once
+SOUNDCLOUD_WORKERS = int(getenv("SOUNDCLOUD_WORKERS", "2"))
+
+# Disk budget for rendered thumbnails in cache/, and renders run at once
+THUMB_CACHE_SIZE = int(getenv("THUMB_CACHE_SIZE", "200"))  # Megabytes
+THUMB_WORKERS = int(getenv("THUMB_WORKERS", "2"))
+
+# /speed changes tempo on the fly. Set SPEED_PRERENDER to True to render speed
+# variants to playback/ instead, kept within SPEED_CACHE_SIZE megabytes.
+SPEED_PRERENDER = getenv("SPEED_PRERENDER", "False").lower() == "true"
+SPEED_CACHE_SIZE = int(getenv("SPEED_CACHE_SIZE", "1024"))  # Megabytes
+SPEED_WORKERS = int(getenv("SPEED_WORKERS", "1"))  # ffmpeg renders at once
+
+# Shared HTTP client used for the download API and thumbnails
+HTTP_LIMIT = int(getenv("HTTP_LIMIT", "100"))
+HTTP_LIMIT_PER_HOST = int(getenv("HTTP_LIMIT_PER_HOST", "20"))
+HTTP_CONNECT_TIMEOUT = int(getenv("HTTP_CONNECT_TIMEOUT", "10"))  # Seconds
+HTTP_READ_TIMEOUT = int(getenv("HTTP_READ_TIMEOUT", "60"))  # Seconds
+HTTP_RETRIES = int(getenv("HTTP_RETRIES", "2"))
+
+# yt-dlp fallback jobs run as separate processes, at most this many at once
+YTDLP_WORKERS = int(getenv("YTDLP_WORKERS", "3"))
+YTDLP_TIMEOUT = int(getenv("YTDLP_TIMEOUT", "600"))  # Seconds per download
+YTDLP_INFO_TIMEOUT = int(getenv("YTDLP_INFO_TIMEOUT", "60"))  # Seconds per lookup
+
+# yt-dlp cookie pool: a cookie is quarantined after this many auth failures in a
+# row (or any 429), and cookie refreshes run at most once per interval
+COOKIE_FAIL_LIMIT = int(getenv("COOKIE_FAIL_LIMIT", "3"))
+COOKIE_QUARANTINE = int(getenv("COOKIE_QUARANTINE", "300"))  # Seconds
+COOKIE_REFRESH_INTERVAL = int(getenv("COOKIE_REFRESH_INTERVAL", "600"))  # Seconds
+
+# Proxies in YTDLP_PROXIES / PLAYWRIGHT_PROXIES are probed against this URL and
+# benched for PROXY_COOLDOWN seconds after PROXY_FAIL_LIMIT failures in a row
+PROXY_PROBE_URL = getenv("PROXY_PROBE_URL", "https://www.youtube.com/generate_204")
+PROXY_PROBE_INTERVAL = int(getenv("PROXY_PROBE_INTERVAL", "300"))  # Seconds, 0 disables
+PROXY_PROBE_TIMEOUT = int(getenv("PROXY_PROBE_TIMEOUT", "10"))  # Seconds
+PROXY_FAIL_LIMIT = int(getenv("PROXY_FAIL_LIMIT", "3"))
+PROXY_COOLDOWN = int(getenv("PROXY_COOLDOWN", "120"))  # Seconds
+
+# Queued tracks downloaded ahead of playback per chat, and downloads at once overall
+PREFETCH_AHEAD = int(getenv("PREFETCH_AHEAD", "2"))
+PREFETCH_WORKERS = int(getenv("PREFETCH_WORKERS", "3"))
+
 ## Fill these variables if you're deploying on heroku.
 HEROKU_APP_NAME = getenv("HEROKU_APP_NAME")
 # Get it from http://dashboard.heroku.com/account
@@ -107,6 +187,17 @@ STRING2 = getenv("STRING_SESSION2", None)
 STRING3 = getenv("STRING_SESSION3", None)
 STRING4 = getenv("STRING_SESSION4", None)
 STRING5 = getenv("STRING_SESSION5", None)
+# Sessions beyond the fifth: STRING_SESSION6, STRING_SESSION7, ... (no upper limit).
+# Assistant number N is always STRING_SESSIONS[N - 1], unset slots stay None.
+_EXTRA_SESSIONS = sorted(
+    int(key[len("STRING_SESSION"):])
+    for key in os.environ
+    if re.fullmatch(r"STRING_SESSION\d+", key) and int(key[len("STRING_SESSION"):]) > 5
+)
+STRING_SESSIONS = [STRING1, STRING2, STRING3, STRING4, STRING5] + [
+    getenv(f"STRING_SESSION{num}") or None
+    for num in range(6, (_EXTRA_SESSIONS[-1] if _EXTRA_SESSIONS else 5) + 1)
+]
 
 
 YUMI_PICS = [